@@ -0,0 +1,301 @@
+"""
+Measure the overhead of cached calls, in nanoseconds per call, next to the
+standard library, and the memory taken by each cached entry. Run with
+`python benchmark.py`, add `--json` for machine-readable output, and
+`--compare old.json` to print each result next to a previous run.
+"""
+import gc
+import sys
+import json
+import time
+import timeit
+import asyncio
+import argparse
+import platform
+import functools
+import itertools
+import threading
+import subprocess
+import tracemalloc
+
+import funccache
+
+
+class Plain:
+
+    def method(self, x):
+        return x
+
+    @functools.lru_cache(maxsize=None)
+    def lru_cache_method(self, x):
+        return x
+
+    @functools.cached_property
+    def cached_property(self):
+        return 1
+
+
+class Cached(metaclass=funccache):
+
+    def method(self, x):
+        return x
+
+    @property
+    def property(self):
+        return 1
+
+
+def identity(x):
+    return x
+
+
+lru_cache_function = functools.lru_cache(maxsize=None)(identity)
+# functools.cache is new in Python 3.9, it is lru_cache(maxsize=None).
+cache_function = getattr(functools, 'cache', functools.lru_cache(None))(
+    identity
+)
+funccache_function = funccache(identity)
+funccache_ttl_function = funccache.ttl(3600)(identity)
+funccache_count_function = funccache.count(1_000_000_000)(identity)
+
+
+def bench(stmt: str, number: int = 1_000_000, repeat: int = 5) -> float:
+    timer = timeit.Timer(stmt, globals=globals())
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+plain, cached = Plain(), Cached()
+plain.lru_cache_method(1), plain.cached_property
+cached.method(1), cached.property
+for func in (
+        lru_cache_function, cache_function, funccache_function,
+        funccache_ttl_function, funccache_count_function
+):
+    func(1)
+
+cases = {
+    'plain method call':             'plain.method(1)',
+    'functools.lru_cache method':    'plain.lru_cache_method(1)',
+    'funccache method':              'cached.method(1)',
+    'functools.cached_property':     'plain.cached_property',
+    'funccache property':            'cached.property',
+    'functools.lru_cache':           'lru_cache_function(1)',
+    'functools.cache':               'cache_function(1)',
+    'funccache':                     'funccache_function(1)',
+    'funccache.ttl':                 'funccache_ttl_function(1)',
+    'funccache.count':               'funccache_count_function(1)',
+}
+
+
+def bench_miss(decorator, number: int = 200_000, repeat: int = 5) -> float:
+    """A new key on every call, so each call computes and stores an entry.
+    `decorator` is called for a new decorator on each repeat, as those of
+    `funccache.ttl` and `funccache.count` decorate only one function. The
+    garbage collector is disabled while timing, as `timeit` does."""
+    best = float('inf')
+    for _ in range(repeat):
+        func = decorator()(identity)
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        for x in range(number):
+            func(x)
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    return best / number * 1e9
+
+
+miss_cases = {
+    'functools.lru_cache':        lambda: functools.lru_cache(maxsize=None),
+    'functools.lru_cache(1024)':  lambda: functools.lru_cache(maxsize=1024),
+    'funccache':                  lambda: funccache,
+    'funccache(maxsize=1024)':    lambda: funccache(maxsize=1024),
+    'funccache.ttl':              lambda: funccache.ttl(3600),
+    'funccache.count':            lambda: funccache.count(3),
+}
+
+
+def memory_per_entry(decorator, number: int = 100_000) -> float:
+    """Bytes taken by one entry, including its key and its slot in the pool,
+    but not the cached value itself."""
+    func = decorator(lambda x: None)
+    func(-1)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for x in range(number):
+        func(x)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / number
+
+
+memory_cases = {
+    'funccache':                  funccache,
+    'funccache.ttl':              funccache.ttl(3600),
+    'funccache.count':            funccache.count(3),
+    'functools.lru_cache':        functools.lru_cache(maxsize=None),
+}
+
+
+def bench_threads(
+        decorator, keys: int, threads: int = 8, number: int = 100_000
+) -> float:
+    """Wall time per call while `threads` threads call concurrently, either
+    all on one key (`keys=1`) or spread over `keys` keys."""
+    func = decorator()(identity)
+    for x in range(keys):
+        func(x)
+    barrier = threading.Barrier(threads + 1)
+
+    def run(offset: int) -> None:
+        calls = itertools.islice(itertools.cycle(range(keys)), offset, None)
+        barrier.wait()
+        for x in itertools.islice(calls, number):
+            func(x)
+
+    workers = [
+        threading.Thread(target=run, args=(i,)) for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (threads * number) * 1e9
+
+
+def bench_threads_miss(
+        decorator, threads: int, number: int = 20_000
+) -> float:
+    """Wall time per call while `threads` threads call concurrently, each on
+    keys no other thread calls, so every call computes and stores an entry."""
+    func = decorator()(identity)
+    barrier = threading.Barrier(threads + 1)
+
+    def run(offset: int) -> None:
+        barrier.wait()
+        for x in range(offset * number, (offset + 1) * number):
+            func(x)
+
+    workers = [
+        threading.Thread(target=run, args=(i,)) for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (threads * number) * 1e9
+
+
+thread_cases = {
+    'functools.lru_cache':        lambda: functools.lru_cache(maxsize=None),
+    'funccache':                  lambda: funccache,
+    'funccache.ttl':              lambda: funccache.ttl(3600),
+    'funccache.count':            lambda: funccache.count(1_000_000_000),
+}
+
+
+def bench_fan_in(tasks: int = 1000, repeat: int = 20) -> float:
+    """Nanoseconds per awaiting task when `tasks` tasks request the same
+    missing key of a coroutine function at once, which is computed once."""
+
+    @funccache.ttl(3600)
+    async def fetch(x):
+        await asyncio.sleep(0)
+        return x
+
+    async def main() -> float:
+        best = float('inf')
+        for x in range(repeat):
+            start = time.perf_counter()
+            await asyncio.gather(*(fetch(x) for _ in range(tasks)))
+            best = min(best, time.perf_counter() - start)
+        return best / tasks * 1e9
+
+    return asyncio.run(main())
+
+
+def import_time(repeat: int = 5) -> float:
+    """Microseconds to import funccache in a new interpreter, as reported by
+    `python -X importtime`, including the modules it imports."""
+    best = float('inf')
+    for _ in range(repeat):
+        stderr = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import funccache'],
+            capture_output=True, text=True, check=True
+        ).stderr
+        for line in stderr.splitlines():
+            _, cumulative, name = line.split('|')
+            if name.strip() == 'funccache':
+                best = min(best, int(cumulative))
+    return best
+
+
+def run() -> dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'hit_ns': {name: bench(stmt) for name, stmt in cases.items()},
+        'miss_ns': {
+            name: bench_miss(decorator)
+            for name, decorator in miss_cases.items()
+        },
+        'memory_bytes_per_entry': {
+            name: memory_per_entry(decorator)
+            for name, decorator in memory_cases.items()
+        },
+        'threads_one_key_ns': {
+            name: bench_threads(decorator, keys=1)
+            for name, decorator in thread_cases.items()
+        },
+        'threads_many_keys_ns': {
+            name: bench_threads(decorator, keys=10_000)
+            for name, decorator in thread_cases.items()
+        },
+        'threads_miss_ns': {
+            f'{name} x{threads}': bench_threads_miss(decorator, threads)
+            for name, decorator in thread_cases.items()
+            for threads in (1, 2, 4, 8)
+        },
+        'asyncio_fan_in_ns': {'funccache.ttl': bench_fan_in()},
+        'import_us': {'funccache': import_time()},
+    }
+
+
+def report(results: dict, previous: dict = None) -> None:
+    for group, values in results.items():
+        if not isinstance(values, dict):
+            print(f'{group:<32}{values:>12}')
+            continue
+        print(f'\n{group}')
+        for name, value in values.items():
+            line = f'  {name:<30}{value:>12.1f}'
+            old = (previous or {}).get(group, {}).get(name)
+            if old:
+                line += f'{old:>12.1f}{value / old:>8.2f}x'
+            print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        '--json', action='store_true', help='print the results as JSON'
+    )
+    parser.add_argument(
+        '--compare', metavar='FILE',
+        help='a JSON file of a previous run to compare with'
+    )
+    args = parser.parse_args()
+
+    results = run()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        previous = None
+        if args.compare:
+            with open(args.compare) as f:
+                previous = json.load(f)
+        report(results, previous)
@@ -11,6 +11,10 @@ value of a callable object or all methods defined in a class.
     >>> def alpha():
     >>>     ...
 
+    >>> @funccache(maxsize=128)
+    >>> def alpha():
+    >>>     ...
+
 ────────────────────────────────────────────────────────────────────────────────
 Copyright (c) 2022-2024 GQYLPY <http://gqylpy.com>. All rights reserved.
 
@@ -30,18 +34,434 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from typing import Optional, Union, Callable
+from concurrent.futures import Executor
+from typing import (
+    Type, Optional, Union, Dict, Iterable, Hashable, Callable, Awaitable,
+    NamedTuple, Any
+)
 
 
-def ttl(x: Optional[Union[int, float, str]] = None, /) -> Callable:
+def ttl(
+        x:         Optional[Union[int, float, str]]   = None,
+        /, *,
+        maxsize:   Optional[int]                      = None,
+        eviction:  Union[str, Type['EvictionPolicy']] = 'LRU',
+        sweep:     Optional[Union[int, float, str]]   = None,
+        normalize: bool                               = False,
+        key:       Optional[Callable[..., Hashable]]  = None,
+        stale_while_revalidate: Optional[Union[int, float, str]] = None,
+        jitter:           Union[int, float]           = 0,
+        early_expiration: Union[int, float]           = 0,
+        disk:      Optional[Union[str, 'DiskStore']]  = None,
+        shared:    Optional[Union[str, 'SharedStore']] = None,
+        max_bytes: Optional[int]                      = None,
+        sizer:     Optional[Callable[[Any], int]]     = None,
+        max_items: Optional[int]                      = None,
+        cache_exceptions: Optional[Union[Type[BaseException], tuple]] = None,
+        exception_ttl:    Union[int, float, str]      = 1,
+        compress:         Optional[Union[str, Any]]   = None,
+        compress_above:   int                         = 1024,
+        depends_on:       Optional[Any]               = None,
+        check_interval:   Union[int, float]           = 1,
+        tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+) -> Callable:
     """Decorator, can specify the cache time to live by the parameter `x`, less
-    than or equal to 0 means immediate expiration, default never expires."""
+    than or equal to 0 means immediate expiration, default never expires.
+    Expired keys are removed from the cache pool on the next insertion.
+
+    @param maxsize
+        The maximum number of cached keys, a non-negative int, default
+        unlimited. When it is reached, keys are evicted according to the
+        parameter `eviction`, 0 caches nothing.
+    @param eviction
+        "LRU" (default), "LFU", "FIFO", or a subclass of `EvictionPolicy`.
+    @param sweep
+        If specified, a daemon thread also removes the expired keys every
+        `sweep` seconds, even if no key is inserted.
+    @param normalize
+        If true, the arguments are bound to the signature of the decorated
+        function, so equivalent calls such as `f(1, 2)`, `f(1, b=2)` and `f(1)`
+        (where `b` defaults to 2) share one cache entry.
+    @param key
+        A function called with the same arguments as the decorated function,
+        returns the cache key, takes precedence over `normalize`. Use it for
+        unhashable arguments, see `freeze_key` and `digest_key`.
+    @param stale_while_revalidate
+        If specified, for this many seconds after a key expires, its stale
+        value is still returned immediately while it is recomputed in the
+        background, on a thread pool (or as an asyncio task for coroutine
+        functions). Beyond that, callers wait for the recomputation. Pass
+        `float('inf')` to always return the stale value.
+    @param jitter
+        A ratio in [0, 1), the time to live of each computed value is
+        randomly scaled within plus or minus this ratio, so keys computed at
+        the same time do not expire at the same time.
+    @param early_expiration
+        If greater than 0, each value is recomputed in the background before
+        it expires, earlier for values that took longer to compute, in
+        proportion to this factor (1 is a good start). The value is still
+        returned until it actually expires.
+    @param disk
+        A file path or a `DiskStore`, used as a second tier: a missing key is
+        looked up there before it is computed, and computed values are written
+        there with their expiration time, so they survive restarts. The
+        decorator `funccache` accepts this parameter as well.
+    @param shared
+        A name or a `SharedStore`, the processes of a host decorating the same
+        function with the same name share its cached values, and a missing key
+        is computed by one process only. Cannot be used with `disk`. The
+        decorator `funccache` accepts this parameter as well, a `funccache`
+        class with a shared cache pool uses the class attribute
+        `__shared_cache__`.
+    @param max_bytes
+        The maximum total size of the cached values in bytes, default
+        unlimited. Each value is estimated once when it is computed, keys are
+        then evicted according to the parameter `eviction` until the total
+        fits. A value larger than `max_bytes` is returned but not cached. All
+        decorators accept this parameter, a `funccache` class uses the class
+        attribute `__max_bytes__`. The total is reported by `cache_info`.
+    @param sizer
+        A function that returns the size of a value in bytes, default
+        `sizeof`. All decorators accept this parameter, a `funccache` class
+        uses the class attribute `__sizer__`.
+    @param max_items
+        For a generator or an async generator function, whose cached value is
+        the stream of its items: the first call pulls the items into a shared
+        buffer, every call replays them from the start, even while they are
+        still being produced. A stream longer than `max_items` items is not
+        cached. The decorators `funccache` and `count` accept this parameter
+        as well.
+    @param cache_exceptions
+        An exception class or a tuple of them. When the computation of a key
+        raises one of them, the exception is kept for `exception_ttl` seconds
+        (default 1) and raised again to the callers of that key, including
+        those waiting for the computation, instead of computing again. All
+        decorators accept these parameters, a `funccache` class uses the class
+        attributes `__cache_exceptions__` and `__exception_ttl__`.
+    @param compress
+        "zlib", "lzma", "bz2", or any object with the functions `compress`
+        and `decompress` of bytes. Cached `str` and `bytes` values larger than
+        `compress_above` bytes (default 1024) are then stored compressed, and
+        decompressed on each hit, other values are stored as they are. The
+        compression ratio and the time spent decompressing are reported by
+        `cache_info`. All decorators accept these parameters, a `funccache`
+        class uses the class attributes `__compress__` and
+        `__compress_above__`.
+    @param depends_on
+        The dependencies of each cached value: a path, an iterable of paths
+        and functions, or a function called with the same arguments as the
+        decorated function, returning such an iterable. The modification time
+        and size of each file, and the return value of each function (taken
+        as a version), are recorded before the value is computed. At most
+        once per `check_interval` seconds (default 1) they are taken again,
+        and the value is recomputed if any changed. A file is stat at most
+        once per interval, however many cached values depend on it. The
+        decorators `funccache` and `count` accept these parameters as well.
+    @param tags
+        The tags of each cached value, used by `invalidate_tag`. Either a
+        function called with the same arguments as the decorated function,
+        returning an iterable of tags, or the same tags for every value. All
+        decorators accept this parameter, a `funccache` class uses the class
+        attribute `__cache_tags__`.
+    """
 
 
-def count(x: Optional[int] = None, /) -> Callable:
+def count(
+        x:         Optional[int]                      = None,
+        /, *,
+        maxsize:   Optional[int]                      = None,
+        eviction:  Union[str, Type['EvictionPolicy']] = 'LRU',
+        normalize: bool                               = False,
+        key:       Optional[Callable[..., Hashable]]  = None,
+        max_bytes: Optional[int]                      = None,
+        sizer:     Optional[Callable[[Any], int]]     = None,
+        max_items: Optional[int]                      = None,
+        cache_exceptions: Optional[Union[Type[BaseException], tuple]] = None,
+        exception_ttl:    Union[int, float, str]      = 1,
+        compress:         Optional[Union[str, Any]]   = None,
+        compress_above:   int                         = 1024,
+        depends_on:       Optional[Any]               = None,
+        check_interval:   Union[int, float]           = 1,
+        tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+) -> Callable:
     """Decorator, cache according to the number of calls. Whenever the number of
     calls reaches `x`, the cache will be invalidated, round by round. Less than
-    or equal to 0 means immediate expiration, default never expires."""
+    or equal to 0 means immediate expiration, default never expires. The
+    parameters `maxsize`, `eviction`, `normalize`, `key`, `max_bytes`, `sizer`,
+    `max_items`, `cache_exceptions`, `exception_ttl`, `compress`,
+    `compress_above`, `depends_on`, `check_interval` and `tags` are the same
+    as `ttl`."""
+
+
+def batch(
+        x:         Optional[Union[int, float, str]] = None,
+        /, *,
+        window:    Union[int, float]                = 0,
+        max_batch: Optional[int]                    = None,
+        maxsize:   Optional[int]                    = None,
+        eviction:  Union[str, Type['EvictionPolicy']] = 'LRU',
+        max_bytes: Optional[int]                    = None,
+        sizer:     Optional[Callable[[Any], int]]   = None,
+        cache_exceptions: Optional[Union[Type[BaseException], tuple]] = None,
+        exception_ttl:    Union[int, float, str]    = 1,
+        compress:         Optional[Union[str, Any]] = None,
+        compress_above:   int                       = 1024,
+        tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+) -> Callable:
+    """Decorator of a coroutine function that takes a list of keys and returns
+    their values, as a list in the same order or as a dict. The decorated
+    function takes a single key instead: cached keys are returned at once,
+    and the missing keys requested together are loaded by one call. The
+    parameter `x` is the time to live, the same as `ttl`.
+
+    @param window
+        How many seconds to wait for more missing keys before calling, by
+        default only the keys requested in the same turn of the event loop.
+    @param max_batch
+        The maximum number of keys per call, default unlimited.
+    @param maxsize, eviction, max_bytes, sizer, tags
+        The same as `ttl`, a `tags` function is called with the key.
+    @param cache_exceptions, exception_ttl
+        The same as `ttl`, if a call fails, each of its keys keeps the error.
+    @param compress, compress_above
+        The same as `ttl`.
+    """
+
+
+def policy(
+        *,
+        ttl:     Optional[Union[int, float, str]] = None,
+        count:   Optional[int]                    = None,
+        maxsize: Optional[int]                    = None
+) -> Callable[[Callable], Callable]:
+    """Decorator of a method in a `funccache` class, gives the method its own
+    cache policy, read once when the class is created. Can decorate a
+    function, staticmethod, classmethod or property.
+
+    @param ttl
+        The time to live of the values of this method, instead of the class
+        attribute `__ttl__`.
+    @param count
+        Cache according to the number of calls instead, the same as `count`.
+        Cannot be used with `ttl`.
+    @param maxsize
+        The maximum number of cached keys of this method, evicted according to
+        the class attribute `__eviction__`. The class attribute `__maxsize__`
+        still limits the keys of all methods together.
+    """
+
+
+def not_cache(method: Callable, /) -> Callable:
+    """Decorator of a method in a `funccache` class, the method is not cached,
+    the same as listing it in the class attribute `__not_cache__`."""
+
+
+def freeze_key(*a, **kw) -> Hashable:
+    """A key function, recursively converts lists, dicts, sets and other
+    containers in the arguments to hashable equivalents, unhashable buffers
+    such as `bytearray`, `memoryview` and NumPy arrays are digested."""
+
+
+def digest_key(*a, **kw) -> Hashable:
+    """A key function, unhashable arguments supporting the buffer protocol,
+    such as `bytearray`, `memoryview` and NumPy arrays, are replaced by a digest
+    of their raw buffer, computed without copying it. Other arguments are used
+    as is."""
+
+
+def sizeof(value: Any, /) -> int:
+    """The default `sizer`, the deep `sys.getsizeof` of `value`: containers,
+    instance attributes and slots are followed, each object is counted once.
+    Buffers and arrays such as `memoryview` and NumPy arrays count at least
+    their `nbytes`, even when they are views."""
+
+
+class EvictionPolicy:
+    """Base class of the eviction policies, subclass it and pass the subclass
+    to the parameter `eviction` (or the class attribute `__eviction__`) to
+    customize which key is evicted from a full cache pool. Every method is
+    expected to run in O(1)."""
+
+    def insert(self, key: Any, /) -> None:
+        """Called when a new key is added to the cache pool."""
+
+    def hit(self, key: Any, /) -> None:
+        """Called when an existing key is accessed."""
+
+    def remove(self, key: Any, /) -> None:
+        """Called when a key is removed by other than eviction."""
+
+    def evict(self) -> Any:
+        """Return the next key to be evicted and stop tracking it, raise
+        `KeyError` if no key is tracked."""
+
+    def clear(self) -> None:
+        """Called when the cache pool is cleared."""
+
+
+class DiskStore:
+    """An SQLite file used as the second tier of the caches given it by the
+    parameter `disk`, it can be shared by several functions and processes.
+
+    @param path
+        The SQLite file, created if it does not exist.
+    @param serializer
+        Any object with `dumps` and `loads`, default `pickle`. Values that fail
+        to be serialized are only kept in memory.
+    @param max_bytes
+        If specified, the least recently written values are dropped once the
+        stored values exceed this size.
+    @param batch_size, flush_interval
+        Values are written by a daemon thread, at most `batch_size` at a time
+        or every `flush_interval` seconds.
+    """
+
+    def __init__(
+            self,
+            path:           str,
+            /, *,
+            serializer:     Any               = ...,
+            max_bytes:      Optional[int]     = None,
+            batch_size:     int               = 128,
+            flush_interval: Union[int, float] = 1
+    ):
+        ...
+
+    def flush(self) -> None:
+        """Wait until the pending writes are done, called at exit."""
+
+
+class SharedStore(DiskStore):
+    """A `DiskStore` in the shared memory directory (`/dev/shm` where
+    available), used by the caches given it by the parameter `shared`. Values
+    are written at once, and a missing key is computed by one process only,
+    while the others wait for it. Hits in the memory of each process do not
+    touch the store.
+
+    @param name
+        The name of the store, or a file path if it contains a path separator.
+    @param lease_timeout
+        A process computing a key for longer, such as a killed one, is taken
+        over by another.
+    @param poll_interval
+        How often waiting processes look for the value.
+    """
+
+    def __init__(
+            self,
+            name:          str,
+            /, *,
+            serializer:    Any               = ...,
+            max_bytes:     Optional[int]     = None,
+            lease_timeout: Union[int, float] = 60,
+            poll_interval: Union[int, float] = .01
+    ):
+        ...
+
+
+class CacheInfo(NamedTuple):
+    """The statistics returned by `cache_info`."""
+    hits:              int
+    misses:            int
+    evictions:         int
+    expirations:       int
+    size:              Optional[int]
+    compute_time:      float
+    nbytes:            Optional[int]   = None
+    compression_ratio: Optional[float] = None
+    decode_time:       Optional[float] = None
+
+
+class WarmInfo(NamedTuple):
+    """The outcome returned by `warm`."""
+    total:    int
+    computed: int
+    cached:   int
+    failed:   int
+    seconds:  float
+
+
+def cache_info(func: Callable, /) -> Union[CacheInfo, Dict[str, CacheInfo]]:
+    """Return the statistics of the specified cached function, or method of a
+    `funccache` class, as a named tuple `CacheInfo(hits, misses, evictions,
+    expirations, size, compute_time, nbytes, compression_ratio, decode_time)`,
+    where `compute_time` is the cumulative seconds spent computing misses, and
+    `nbytes` the total size of the cached values if `max_bytes` is specified,
+    otherwise None. `compression_ratio` is the size of the values compressed so
+    far divided by their compressed size, and `decode_time` the cumulative
+    seconds spent decompressing them, see the parameter `compress`, both are
+    None until a value is compressed. For a `funccache` class or instance,
+    return a dict that maps each cached method name to its statistics. The size
+    of a method is only known where its cache pool is, otherwise it is None."""
+
+
+def set_cache_hooks(
+        func:       Callable,
+        /, *,
+        on_hit:     Optional[Callable[[Any], None]]        = None,
+        on_miss:    Optional[Callable[[Any], None]]        = None,
+        on_compute: Optional[Callable[[Any, float], None]] = None
+) -> None:
+    """Set the callbacks of the specified cached function, method, or all
+    methods of a `funccache` class or instance, an instance sharing them with
+    its class. `on_hit` and `on_miss` receive the cache key, `on_compute`
+    receives the cache key and the seconds the computation took. Pass None to
+    remove a callback."""
+
+
+def invalidate(func: Callable, /, *a, **kw) -> bool:
+    """Remove the value cached for the specified arguments, called the same
+    way as the cached function or method. A method not bound to an instance
+    takes the instance as the first argument. The value stored by `disk` or
+    `__shared_cache__` is removed as well. Return whether it was cached in
+    memory."""
+
+
+def invalidate_where(
+        func: Callable, predicate: Callable[[Any], bool], /
+) -> int:
+    """Remove the values of the cached function or method whose cache key
+    satisfies `predicate`, and return how many were removed. Unless a key
+    function is used, the cache key is a tuple `(args, kwargs)`, where
+    `kwargs` is a frozenset of the keyword arguments. `func` can also be a
+    `funccache` class or instance, then `predicate` receives the keys of all
+    methods, as tuples `(method qualified name, key)`. Only the keys held in
+    memory are matched, a value stored only on disk is kept."""
+
+
+def invalidate_tag(*tags: Hashable) -> int:
+    """Remove the values of all caches tagged with any of the specified tags,
+    see the parameter `tags`, and return how many were removed. Each tag is
+    indexed, no cache pool is scanned, so only the keys held in memory are
+    reached, a value stored only on disk is kept."""
+
+
+def warm(
+        func:     Callable,
+        calls:    Iterable,
+        /, *,
+        workers:  int                                  = 32,
+        executor: Optional[Executor]                   = None,
+        progress: Optional[Callable[[int, int], None]] = None
+) -> Union[WarmInfo, Awaitable[WarmInfo]]:
+    """Fill the cache of the specified function or method before it is needed,
+    for example before a service reports ready. Each item of `calls` is the
+    arguments of one call: a tuple of positional arguments, a dict of keyword
+    arguments, or else a single argument. Keys already cached are skipped, the
+    others are computed concurrently through the cached function itself, so a
+    key computed by a live call at the same time is not computed twice. Return
+    `WarmInfo(total, computed, cached, failed, seconds)`, exceptions are
+    counted as failed but not raised. For a coroutine function, return an
+    awaitable of it, the calls run as tasks on the current event loop.
+
+    @param workers
+        The maximum number of concurrent calls.
+    @param executor
+        A thread pool to run the calls on instead of a new one of `workers`
+        threads, it is not shut down.
+    @param progress
+        Called with the number of calls done and the total after each call.
+    """
 
 
 def clear_cache_pool(func: Callable, /) -> None:
@@ -63,6 +483,23 @@ class _xe6_xad_x8c_xe7_x90_xaa_xe6_x80_xa1_xe7_x8e_xb2_xe8_x90_x8d_xe4_xba_x91:
     FuncCache.FuncCache        = FuncCache
     FuncCache.ttl              = gcode.FunctionCallerTTL
     FuncCache.count            = gcode.FunctionCallerCount
+    FuncCache.batch            = gcode.FunctionCallerBatch
+    FuncCache.policy           = gcode.policy
+    FuncCache.not_cache        = gcode.not_cache
+    FuncCache.EvictionPolicy   = gcode.EvictionPolicy
+    FuncCache.DiskStore        = gcode.DiskStore
+    FuncCache.SharedStore      = gcode.SharedStore
+    FuncCache.CacheInfo        = gcode.CacheInfo
+    FuncCache.WarmInfo         = gcode.WarmInfo
+    FuncCache.freeze_key       = gcode.freeze_key
+    FuncCache.digest_key       = gcode.digest_key
+    FuncCache.sizeof           = gcode.sizeof
+    FuncCache.cache_info       = gcode.cache_info
+    FuncCache.set_cache_hooks  = gcode.set_cache_hooks
+    FuncCache.invalidate       = gcode.invalidate
+    FuncCache.invalidate_where = gcode.invalidate_where
+    FuncCache.invalidate_tag   = gcode.invalidate_tag
+    FuncCache.warm             = gcode.warm
     FuncCache.clear_cache_pool = gcode.clear_cache_pool
 
     sys.modules[__name__] = FuncCache
@@ -13,18 +13,37 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import os
 import re
 import sys
 import time
+import math
+import heapq
+import random
+import queue
+import pickle
+import atexit
+import sqlite3
 import asyncio
+import tempfile
+import hashlib
+import inspect
+import weakref
 import threading
 import functools
+import itertools
 
-from types import MethodType, FunctionType
+from types import MethodType, FunctionType, ModuleType, MemberDescriptorType
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import (
+    Executor, ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
+)
 
 from typing import (
-    TypeVar, Type, Optional, Union, Dict, List, Tuple, Set, Iterable, Callable,
-    FrozenSet, Any
+    TypeVar, Type, Optional, Union, Dict, List, Tuple, Set, Iterable, Iterator,
+    AsyncIterator, Callable, Awaitable, Hashable, FrozenSet, NamedTuple,
+    NoReturn, Any
 )
 
 if sys.version_info >= (3, 10):
@@ -36,15 +55,23 @@ MethodTypeOrName: TypeAlias = TypeVar('MethodTypeOrName', MethodType, str)
 TTL: TypeAlias = TypeVar('TTL', int, float, str)
 Wrapped = WrappedClosure = TypeVar('Wrapped', bound=Callable[..., Any])
 WrappedReturn: TypeAlias = TypeVar('WrappedReturn')
+Eviction: TypeAlias = TypeVar('Eviction', str, Type['EvictionPolicy'])
+Exceptions: TypeAlias = Union[
+    Type[BaseException], Tuple[Type[BaseException], ...]
+]
+# "zlib", "lzma", "bz2", or any object with the functions `compress` and
+# `decompress` of bytes, as those modules have.
+Codec: TypeAlias = Union[str, ModuleType, Any]
+Depends: TypeAlias = Union[Callable[..., Iterable], Iterable, str, os.PathLike]
 
 MethodCachePool: TypeAlias = Dict[
     Union[Tuple[str, Tuple[Tuple[Any, ...], FrozenSet[Tuple[str, Any]]]], str],
-    Dict[str, Any]
+    'TTLEntry'
 ]
 
 FuncCachePool: TypeAlias = Dict[
     Tuple[Tuple[Any, ...], FrozenSet[Tuple[str, Any]]],
-    Dict[str, Any]
+    'Entry'
 ]
 
 
@@ -52,12 +79,33 @@ class FuncCache(type):
     __shared_instance_cache__: bool = False
     __not_cache__: List[MethodTypeOrName] = []
     __ttl__: TTL = float('inf')
+    __maxsize__: Optional[int] = None
+    __eviction__: Eviction = 'LRU'
+    __sweep__: Optional[TTL] = None
+    __stale_while_revalidate__: Optional[TTL] = None
+    __ttl_jitter__: Union[int, float] = 0
+    __early_expiration__: Union[int, float] = 0
+    __shared_cache__: Optional[Union[str, 'SharedStore']] = None
+    __normalize__: bool = False
+    __cache_key__: Optional[Callable[..., Hashable]] = None
+    __cache_tags__: Optional[Union[Callable[..., Iterable], Iterable]] = None
+    __max_bytes__: Optional[int] = None
+    __sizer__: Optional[Callable[[Any], int]] = None
+    __cache_exceptions__: Optional[Exceptions] = None
+    __exception_ttl__: TTL = 1
+    __compress__: Optional[Codec] = None
+    __compress_above__: int = 1024
 
     def __new__(
-            mcs, __name__: Union[str, Wrapped, Type[object]], *a, **kw
-    ) -> Union['FuncCache', 'FunctionCaller']:
+            mcs, __name__: Optional[Union[str, Wrapped, Type[object]]] = None,
+            *a, **kw
+    ) -> Union['FuncCache', 'FunctionCaller', Callable]:
+        if __name__ is None:
+            return functools.partial(FunctionCaller, **kw)
         if isinstance(__name__, (FunctionType, type)):
-            return FunctionCaller(__name__)
+            return FunctionCaller(__name__, **kw)
+        if len(a) == 2 and '__slots__' in a[1]:
+            mcs.add_cache_pool_slot(*a)
         return type.__new__(mcs, __name__, *a, **kw)
 
     def __init__(cls, __name__: str, __bases__: tuple, __dict__: dict):
@@ -68,18 +116,6 @@ class FuncCache(type):
             cls.check_and_tidy_not_cache(__not_cache__)
             cls.dedup(__not_cache__)
 
-        if '__getattribute__' in __dict__:
-            raise AttributeError(
-                f'instances of "{FuncCache.__name__}" are not allowed to '
-                'define method "__getattribute__".'
-            )
-
-        cls.__getattribute__ = __getattribute__(cls)
-
-        if cls.__shared_instance_cache__:
-            cls.__primary_lock__ = threading.Lock()
-            cls.__cache_pool__: MethodCachePool = {}
-
         if isinstance(cls.__ttl__, str):
             cls.__ttl__ = time2second(cls.__ttl__)
         elif not isinstance(cls.__ttl__, (int, float)):
@@ -88,16 +124,179 @@ class FuncCache(type):
                 f'float, not {cls.__ttl__!r}.'
             )
 
+        check_maxsize_and_eviction(
+            cls.__maxsize__, cls.__eviction__,
+            name='class attribute "__maxsize__"',
+            ename='class attribute "__eviction__"'
+        )
+
+        if isinstance(cls.__sweep__, str):
+            cls.__sweep__ = time2second(cls.__sweep__)
+        elif not (
+                cls.__sweep__ is None or isinstance(cls.__sweep__, (int, float))
+        ):
+            raise TypeError(
+                'class attribute "__sweep__" is expected to be of type int or '
+                f'float, not {cls.__sweep__!r}.'
+            )
+
+        swr: Optional[TTL] = cls.__stale_while_revalidate__
+        if isinstance(swr, str):
+            cls.__stale_while_revalidate__ = time2second(swr)
+        elif not (swr is None or isinstance(swr, (int, float))):
+            raise TypeError(
+                'class attribute "__stale_while_revalidate__" is expected to '
+                f'be of type int or float, not {swr!r}.'
+            )
+
+        check_jitter_and_early_expiration(
+            cls.__ttl_jitter__, cls.__early_expiration__,
+            name='class attribute "__ttl_jitter__"',
+            ename='class attribute "__early_expiration__"'
+        )
+
+        check_max_bytes(
+            cls.__max_bytes__, cls.__sizer__,
+            name='class attribute "__max_bytes__"',
+            sname='class attribute "__sizer__"'
+        )
+
+        cls.__cache_errors__: Optional[Tuple[tuple, Union[int, float]]] = \
+            check_cache_exceptions(
+                cls.__cache_exceptions__, cls.__exception_ttl__,
+                name='class attribute "__cache_exceptions__"',
+                tname='class attribute "__exception_ttl__"'
+            )
+
+        cls.__compression__: Optional[Tuple[Codec, int]] = check_compress(
+            cls.__compress__, cls.__compress_above__,
+            name='class attribute "__compress__"',
+            aname='class attribute "__compress_above__"'
+        )
+
+        if not (
+                cls.__shared_cache__ is None or cls.__shared_instance_cache__
+        ):
+            raise ValueError(
+                'class attribute "__shared_cache__" requires class attribute '
+                '"__shared_instance_cache__" to be True, the cache pools of '
+                'instances cannot be shared by processes.'
+            )
+
+        cls.wrap_methods()
+
+        if cls.__shared_instance_cache__:
+            cls.__cache_pool__: MethodCachePool = cls.new_cache_pool()
+            cls.__primary_lock__ = cls.__cache_pool__.lock
+
+            if cls.__shared_cache__ is not None:
+                cls.__cache_pool__.attach(open_store(
+                    cls.__shared_cache__, SharedStore,
+                    name='class attribute "__shared_cache__"'
+                ), f'{cls.__module__}.{cls.__qualname__}')
+
+        elif isinstance(getattr(cls, '__cache_pool__', None), CachePool):
+            # Instances are not to use the pool a base class shares.
+            cls.__cache_pool__ = unallocated
+
         type.__init__(cls, __name__, __bases__, __dict__)
 
-    def __call__(cls, *a, **kw):
-        ins: cls = type.__call__(cls, *a, **kw)
+    def new_cache_pool(cls) -> 'CachePool':
+        pool = CachePool(
+            cls.__maxsize__, cls.__eviction__, cls.__sweep__,
+            cls.__method_stats__, cls.__stale_while_revalidate__,
+            cls.__ttl_jitter__, cls.__early_expiration__,
+            cls.__max_bytes__, cls.__sizer__, cls.__method_quotas__
+        )
+        if cls.__cache_errors__ is not None:
+            pool.keep_errors(*cls.__cache_errors__)
+        if cls.__compression__ is not None:
+            pool.compress(*cls.__compression__)
+        return pool
+
+    def allocate_cache_pool(cls, ins: Any, /) -> 'CachePool':
+        # Unless shared, an instance gets its cache pool on its first cached
+        # call, most instances of some classes never make one. The pool is
+        # read and set bypassing `__getattr__` and `__setattr__`, which the
+        # class may define for its own attributes.
+        with allocation_lock:
+            try:
+                return object.__getattribute__(ins, '__cache_pool__')
+            except AttributeError:
+                pool: CachePool = cls.new_cache_pool()
+                object.__setattr__(ins, '__cache_pool__', pool)
+                return pool
+
+    @staticmethod
+    def add_cache_pool_slot(__bases__: tuple, __dict__: dict, /) -> None:
+        # Instances of a class defining `__slots__` keep their cache pool in a
+        # slot, unless a base class already has one. The slot of a base class
+        # sharing its pool is replaced by the pool, so it is not inherited.
+        for base in __bases__:
+            inherited: Any = getattr(base, '__cache_pool__', missing)
+            if inherited is not missing:
+                if inherited.__class__ is MemberDescriptorType:
+                    return
+                break
+        slots: Any = __dict__['__slots__']
+        if slots.__class__ is str:
+            slots = slots,
+        if isinstance(slots, dict):
+            __dict__['__slots__'] = {**slots, '__cache_pool__': None}
+        else:
+            __dict__['__slots__'] = (*slots, '__cache_pool__')
+
+    def wrap_methods(cls) -> None:
+        cls.__method_callers__: Dict[str, MethodCaller] = {}
+        cls.__method_stats__: Dict[str, Stats] = {}
+        cls.__method_quotas__: Dict[str, int] = {}
 
-        if not cls.__shared_instance_cache__:
-            ins.__primary_lock__ = threading.Lock()
-            ins.__cache_pool__ = {}
+        for base in reversed(cls.__mro__[1:]):
+            cls.__method_callers__.update(
+                base.__dict__.get('__method_callers__', {})
+            )
+            cls.__method_stats__.update(
+                base.__dict__.get('__method_stats__', {})
+            )
+            cls.__method_quotas__.update(
+                base.__dict__.get('__method_quotas__', {})
+            )
 
-        return ins
+        for name, value in tuple(cls.__dict__.items()):
+            # An inherited method overridden here is no longer called.
+            cls.__method_callers__.pop(name, None)
+            if not (
+                    name[:2] == name[-2:] == '__'
+                    or name in cls.__not_cache__
+                    or value.__class__ not in (
+                        FunctionType, staticmethod, classmethod, property
+                    )
+                    or not getattr(
+                        method_function(value), '__cache_policy__',
+                        default_policy
+                    ).cache
+            ):
+                caller = cls.__method_callers__[name] = \
+                    MethodCaller(cls, name, value)
+                cls.__method_stats__[caller.__qualname__] = \
+                    caller.__cache_stats__
+                if caller.maxsize is not None:
+                    cls.__method_quotas__[caller.__qualname__] = \
+                        caller.maxsize
+                type.__setattr__(cls, name, caller.wrapper())
+
+        # An inherited method listed in `__not_cache__` gets its original back.
+        for name in cls.__not_cache__:
+            if name in cls.__dict__:
+                continue
+            cls.__method_callers__.pop(name, None)
+            for base in cls.__mro__[1:]:
+                if name in base.__dict__:
+                    caller: Optional[MethodCaller] = \
+                        base.__dict__.get('__method_callers__', {}).get(name)
+                    if caller is not None:
+                        type.__setattr__(cls, name, caller.__method__)
+                    break
 
     def check_and_tidy_not_cache(
             cls, __not_cache__: List[MethodTypeOrName], /
@@ -168,95 +367,371 @@ class FuncCache(type):
 
 
 class MethodCaller:
-
-    def __new__(
-            cls,
-            cls_:   FuncCache,
-            sget:   Callable[[str], Any],
-            name:   str,
-            method: Union[MethodType, property]
-    ) -> Any:
-        if method.__class__ is not property:
-            return object.__new__(cls)
-
-        __cache_pool__: MethodCachePool = sget('__cache_pool__')
-        cache: Dict[str, Any] = __cache_pool__.get(name)
-
-        if not cache:
-            with sget('__primary_lock__'):
-                if name in __cache_pool__:
-                    cache: Dict[str, Any] = __cache_pool__[name]
-                else:
-                    cache = __cache_pool__[name] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__expiration_time__': 0
-                    }
-
-        if cache['__expiration_time__'] < time.monotonic():
-            with cache['__secondary_lock__']:
-                if cache['__expiration_time__'] < time.monotonic():
-                    cache['__return__'] = sget(name)
-                    cache['__expiration_time__'] = \
-                        time.monotonic() + cls_.__ttl__
-
-        return cache['__return__']
+    """Created once per cached method when the class is created, the method in
+    the class is replaced by the object returned by `wrapper`, so a cached call
+    costs no more than a bound method plus a lookup in `__cache_pool__`."""
 
     def __init__(
             self,
             cls:    FuncCache,
-            sget:   Callable[[str], Any],
             name:   str,
-            method: MethodType
+            method: Union[FunctionType, staticmethod, classmethod, property]
     ):
-        self.__cls        = cls
-        self.__sget       = sget
+        func: FunctionType = method_function(method)
+        policy: MethodPolicy = getattr(func, '__cache_policy__', default_policy)
+
+        self.__objclass__ = cls
         self.__name__     = name
-        self.__func__     = method
-        self.__qualname__ = method.__qualname__
+        self.__method__   = method
+        self.__func__     = func
+        self.__qualname__ = func.__qualname__
+        self.__async      = asyncio.iscoroutinefunction(func)
+        self.__ttl        = policy.ttl
+        self.__count      = policy.count
+        self.maxsize      = policy.maxsize
+
+        if policy.count is not None:
+            self.call, self.acall, self.fget = \
+                self.call_count, self.acall_count, self.fget_count
+
+        self.__cache_stats__ = Stats()
+
+        if cls.__compression__ is not None:
+            codec: Codec = cls.__compression__[0]
+            self.call, self.acall, self.fget = (
+                unpacking(core, codec, self.__cache_stats__)
+                for core in (self.call, self.acall, self.fget)
+            )
+            # No longer a bound method, found by `find_method_caller` by this.
+            self.fget.__method_caller__ = self
+        if cls.__cache_key__ is not None:
+            self.__key = cls.__cache_key__
+        elif cls.__normalize__:
+            self.__key = signature_key(
+                func, skip_first=method.__class__ is not staticmethod
+            )
+        else:
+            self.__key = None
 
-    def __call__(self, *a, **kw) -> Any:
-        key = self.__name__, (a, frozenset(kw.items()))
+        self.__tags: Optional[Callable[..., Iterable]] = tags_function(
+            cls.__cache_tags__, name='class attribute "__cache_tags__"'
+        )
 
-        __cache_pool__: MethodCachePool = self.__sget('__cache_pool__')
-        cache: Dict[str, Any] = __cache_pool__.get(key)
+    def wrapper(self) -> Union[FunctionType, 'MethodDescriptor', property]:
+        if self.__method__.__class__ is property:
+            return property(
+                self.fget, self.__method__.fset, self.__method__.fdel,
+                self.__method__.__doc__
+            )
 
-        if not cache:
-            with self.__sget('__primary_lock__'):
-                if key in __cache_pool__:
-                    cache: Dict[str, Any] = __cache_pool__[key]
-                else:
-                    cache = __cache_pool__[key] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__expiration_time__': 0
-                    }
+        if self.__method__.__class__ in (staticmethod, classmethod):
+            return MethodDescriptor(self)
+
+        if self.__async:
+            acall = self.acall
+            async def inner(ins: Any, /, *a, **kw) -> Any:
+                return await acall(ins, a, kw)
+        else:
+            call = self.call
+            def inner(ins: Any, /, *a, **kw) -> Any:
+                return call(ins, a, kw)
+
+        inner.__method_caller__ = self
+
+        return functools.wraps(self.__func__)(inner)
+
+    def __call__(self, ins: Any, /, *a, **kw) -> Any:
+        if self.__async:
+            return self.acall(ins, a, kw)
+        return self.call(ins, a, kw)
+
+    def cache_key(self, a: tuple, kw: dict, /) -> Any:
+        if self.__method__.__class__ is property:
+            return self.__qualname__
+        return self.__qualname__, (
+            (a, frozenset(kw.items()) if kw else nokw)
+            if self.__key is None else self.__key(*a, **kw)
+        )
+
+    def call(self, ins: Any, a: tuple, kw: dict, /) -> Any:
+        key = self.__qualname__, (
+            (a, frozenset(kw.items()) if kw else nokw)
+            if self.__key is None else self.__key(*a, **kw)
+        )
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[TTLEntry] = __cache_pool__.get(key)
+
+        if entry is None or (
+                entry.expires != inf and entry.expires < time.monotonic()
+        ):
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags(*a, **kw))
+            return __cache_pool__.load(
+                key, TTLEntry,
+                lambda: self.__method__.__get__(ins, ins.__class__)(*a, **kw),
+                ins.__class__.__ttl__ if self.__ttl is None else self.__ttl,
+                self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
 
-        if cache['__expiration_time__'] < time.monotonic():
-            with cache['__secondary_lock__']:
-                if cache['__expiration_time__'] < time.monotonic():
-                    cache['__return__'] = self.__sget(self.__name__)(*a, **kw)
-                    cache['__expiration_time__'] = \
-                        time.monotonic() + self.__cls.__ttl__
+        self.__cache_stats__.hit(key)
 
-        return cache['__return__']
+        return entry.value
+
+    async def acall(self, ins: Any, a: tuple, kw: dict, /) -> Any:
+        key = self.__qualname__, (
+            (a, frozenset(kw.items()) if kw else nokw)
+            if self.__key is None else self.__key(*a, **kw)
+        )
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[TTLEntry] = __cache_pool__.get(key)
+
+        if entry is None or entry.expires < time.monotonic():
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags(*a, **kw))
+            return await __cache_pool__.aload(
+                key, TTLEntry,
+                lambda: self.__method__.__get__(ins, ins.__class__)(*a, **kw),
+                ins.__class__.__ttl__ if self.__ttl is None else self.__ttl,
+                self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
+
+    def fget(self, ins: Any, /) -> Any:
+        key: str = self.__qualname__
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[TTLEntry] = __cache_pool__.get(key)
+
+        if entry is None or (
+                entry.expires != inf and entry.expires < time.monotonic()
+        ):
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags())
+            return __cache_pool__.load(
+                key, TTLEntry, lambda: self.__func__(ins),
+                ins.__class__.__ttl__ if self.__ttl is None else self.__ttl,
+                self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
+
+    def call_count(self, ins: Any, a: tuple, kw: dict, /) -> Any:
+        key = self.__qualname__, (
+            (a, frozenset(kw.items()) if kw else nokw)
+            if self.__key is None else self.__key(*a, **kw)
+        )
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[CountEntry] = __cache_pool__.get(key)
+
+        if entry is None or next(entry.calls) >= self.__count:
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags(*a, **kw))
+            return __cache_pool__.load(
+                key, CountEntry,
+                lambda: self.__method__.__get__(ins, ins.__class__)(*a, **kw),
+                self.__count, self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
+
+    async def acall_count(self, ins: Any, a: tuple, kw: dict, /) -> Any:
+        key = self.__qualname__, (
+            (a, frozenset(kw.items()) if kw else nokw)
+            if self.__key is None else self.__key(*a, **kw)
+        )
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[CountEntry] = __cache_pool__.get(key)
+
+        if entry is None or next(entry.calls) >= self.__count:
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags(*a, **kw))
+            return await __cache_pool__.aload(
+                key, CountEntry,
+                lambda: self.__method__.__get__(ins, ins.__class__)(*a, **kw),
+                self.__count, self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
+
+    def fget_count(self, ins: Any, /) -> Any:
+        key: str = self.__qualname__
+
+        try:
+            __cache_pool__: MethodCachePool = \
+                object.__getattribute__(ins, '__cache_pool__')
+        except AttributeError:
+            __cache_pool__ = ins.__class__.allocate_cache_pool(ins)
+        entry: Optional[CountEntry] = __cache_pool__.get(key)
+
+        if entry is None or next(entry.calls) >= self.__count:
+            if self.__tags is not None:
+                __cache_pool__.tag(key, self.__tags())
+            return __cache_pool__.load(
+                key, CountEntry, lambda: self.__func__(ins), self.__count,
+                self.__cache_stats__
+            )
+
+        if __cache_pool__.eviction is not None:
+            __cache_pool__.eviction.hit(key)
+            if self.maxsize is not None:
+                __cache_pool__.quotas[self.__qualname__].eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
 
     def __str__(self) -> str:
         return f'{MethodCaller.__name__}' \
-               f'({self.__cls.__module__}.{self.__qualname__})'
+               f'({self.__objclass__.__module__}.{self.__qualname__})'
+
+
+class MethodDescriptor:
+    """Replaces a cached `staticmethod` or `classmethod`, cached when accessed
+    through an instance, and the original is returned when accessed through
+    the class, since there is no instance to hold the cache pool."""
+
+    def __init__(self, caller: MethodCaller, /):
+        self.caller = caller
+        self.__wrapped__ = caller.__method__
+        self.__doc__ = caller.__func__.__doc__
+
+    def __get__(self, ins: Any, owner: Optional[type] = None) -> Callable:
+        if ins is None:
+            return self.__wrapped__.__get__(ins, owner)
+        return MethodType(self.caller, ins)
 
 
 class FunctionCaller:
 
-    def __init__(self, func: Wrapped, /):
+    def __init__(
+            self,
+            func:     Wrapped,
+            /, *,
+            maxsize:   Optional[int] = None,
+            eviction:  Eviction      = 'LRU',
+            normalize: bool          = False,
+            key:       Optional[Callable[..., Hashable]] = None,
+            disk:      Optional[Union[str, os.PathLike, 'DiskStore']] = None,
+            shared:    Optional[Union[str, os.PathLike, 'SharedStore']] = None,
+            max_bytes: Optional[int] = None,
+            sizer:     Optional[Callable[[Any], int]] = None,
+            max_items: Optional[int] = None,
+            cache_exceptions: Optional[Exceptions] = None,
+            exception_ttl:    TTL                  = 1,
+            compress:         Optional[Codec]      = None,
+            compress_above:   int                  = 1024,
+            depends_on:       Optional[Depends]    = None,
+            check_interval:   Union[int, float]    = 1,
+            tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+    ):
+        check_maxsize_and_eviction(maxsize, eviction)
+        check_max_bytes(max_bytes, sizer)
+        errors: Optional[Tuple[tuple, Union[int, float]]] = \
+            check_cache_exceptions(cache_exceptions, exception_ttl)
+        compression: Optional[Tuple[Codec, int]] = \
+            check_compress(compress, compress_above)
+        check_max_items(max_items)
+        depends: Optional[tuple] = check_depends(depends_on, check_interval)
+        store: Optional[DiskStore] = select_store(disk, shared)
         self.__func__ = func
+        self.__tags: Optional[Callable[..., Iterable]] = tags_function(tags)
+
+        if key is not None:
+            self.__key = key
+        elif normalize:
+            self.__key = signature_key(func)
+        else:
+            self.__key = None
 
         if func.__class__ is FunctionType:
             self.__globals__ = func.__globals__
             functools.wraps(func)(self)
             if asyncio.iscoroutinefunction(getattr(func, '__wrapped__', func)):
                 self.core = self.acore
+            elif is_generator_function(func):
+                check_stream_store(func, store)
+                self.__func__ = streaming(func, max_items)
+                self.core = self.gcore
+
+        self.__cache_stats__ = Stats()
+        self.__cache_pool__: FuncCachePool = CachePool(
+            maxsize, eviction, None, self.__cache_stats__, None, 0, 0,
+            max_bytes, sizer
+        )
+        self.__primary_lock__ = self.__cache_pool__.lock
+        if errors is not None:
+            self.__cache_pool__.keep_errors(*errors)
+        if compression is not None:
+            self.__cache_pool__.compress(*compression)
+            self.core = unpacking(
+                self.core, compression[0], self.__cache_stats__
+            )
+        if depends is not None:
+            self.__cache_pool__.depends = {}
+            self.core = validating(self.core, self, *depends)
 
-        self.__primary_lock__ = threading.Lock()
-        self.__cache_pool__: FuncCachePool = {}
+        if store is not None:
+            self.__cache_pool__.attach(
+                store, f'{func.__module__}.{func.__qualname__}'
+            )
 
     def __call__(self, *a, **kw) -> WrappedReturn:
         return self.core(*a, **kw)
@@ -264,60 +739,88 @@ class FunctionCaller:
     def __str__(self) -> str:
         return str(self.__func__)
 
+    def cache_key(self, *a, **kw) -> Any:
+        if self.__key is None:
+            return a, frozenset(kw.items()) if kw else nokw
+        return self.__key(*a, **kw)
+
     def core(self, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
+        else:
+            key = self.__key(*a, **kw)
+        entry: Optional[Entry] = self.__cache_pool__.get(key)
+
+        if entry is None or entry.value is missing:
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return self.__cache_pool__.load(
+                key, Entry, lambda: self.__func__(*a, **kw), None,
+                self.__cache_stats__
+            )
 
-        try:
-            cache: Dict[str, Any] = self.__cache_pool__[key]
-        except KeyError:
-            with self.__primary_lock__:
-                if key in self.__cache_pool__:
-                    cache: Dict[str, Any] = self.__cache_pool__[key]
-                else:
-                    cache = self.__cache_pool__[key] = \
-                        {'__secondary_lock__': threading.Lock()}
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
-        try:
-            result: Any = cache['__return__']
-        except KeyError:
-            with cache['__secondary_lock__']:
-                if '__return__' in cache:
-                    result: Any = cache['__return__']
-                else:
-                    result = cache['__return__'] = self.__func__(*a, **kw)
-                    del cache['__secondary_lock__']
+        self.__cache_stats__.hit(key)
 
-        return result
+        return entry.value
+
+    def gcore(self, *a, **kw) -> Union[Iterator, AsyncIterator]:
+        return replay(
+            self, FunctionCaller.core(self, *a, **kw), self.__wrapped__, a, kw
+        )
 
     async def acore(self, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
+        else:
+            key = self.__key(*a, **kw)
+        entry: Optional[Entry] = self.__cache_pool__.get(key)
+
+        if entry is None or entry.value is missing:
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return await self.__cache_pool__.aload(
+                key, Entry, lambda: self.__func__(*a, **kw), None,
+                self.__cache_stats__
+            )
 
-        try:
-            cache: Dict[str, Any] = self.__cache_pool__[key]
-        except KeyError:
-            with self.__primary_lock__:
-                if key in self.__cache_pool__:
-                    cache: Dict[str, Any] = self.__cache_pool__[key]
-                else:
-                    cache = self.__cache_pool__[key] = \
-                        {'__secondary_lock__': threading.Lock()}
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
-        try:
-            result: Any = cache['__return__']
-        except KeyError:
-            with cache['__secondary_lock__']:
-                if '__return__' in cache:
-                    result: Any = cache['__return__']
-                else:
-                    result = cache['__return__'] = await self.__func__(*a, **kw)
-                    del cache['__secondary_lock__']
+        self.__cache_stats__.hit(key)
 
-        return result
+        return entry.value
 
 
 class FunctionCallerTTL:
 
-    def __init__(self, ttl: TTL = float('inf'), /):
+    def __init__(
+            self,
+            ttl:       TTL           = float('inf'),
+            /, *,
+            maxsize:   Optional[int] = None,
+            eviction:  Eviction      = 'LRU',
+            sweep:     Optional[TTL] = None,
+            normalize: bool          = False,
+            key:       Optional[Callable[..., Hashable]] = None,
+            stale_while_revalidate: Optional[TTL] = None,
+            jitter:           Union[int, float] = 0,
+            early_expiration: Union[int, float] = 0,
+            disk:      Optional[Union[str, os.PathLike, 'DiskStore']] = None,
+            shared:    Optional[Union[str, os.PathLike, 'SharedStore']] = None,
+            max_bytes: Optional[int] = None,
+            sizer:     Optional[Callable[[Any], int]] = None,
+            max_items: Optional[int] = None,
+            cache_exceptions: Optional[Exceptions] = None,
+            exception_ttl:    TTL                  = 1,
+            compress:         Optional[Codec]      = None,
+            compress_above:   int                  = 1024,
+            depends_on:       Optional[Depends]    = None,
+            check_interval:   Union[int, float]    = 1,
+            tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+    ):
         if isinstance(ttl, str):
             ttl = time2second(ttl)
         elif not isinstance(ttl, (int, float)):
@@ -326,166 +829,3067 @@ class FunctionCallerTTL:
                 f'not {ttl!r}.'
             )
 
+        if isinstance(sweep, str):
+            sweep = time2second(sweep)
+        elif not (sweep is None or isinstance(sweep, (int, float))):
+            raise TypeError(
+                'parameter "sweep" is expected to be of type int or float, '
+                f'not {sweep!r}.'
+            )
+
+        swr: Optional[TTL] = stale_while_revalidate
+        if isinstance(swr, str):
+            swr = time2second(swr)
+        elif not (swr is None or isinstance(swr, (int, float))):
+            raise TypeError(
+                'parameter "stale_while_revalidate" is expected to be of type '
+                f'int or float, not {swr!r}.'
+            )
+
+        check_maxsize_and_eviction(maxsize, eviction)
+        check_jitter_and_early_expiration(jitter, early_expiration)
+        check_max_bytes(max_bytes, sizer)
+        errors: Optional[Tuple[tuple, Union[int, float]]] = \
+            check_cache_exceptions(cache_exceptions, exception_ttl)
+        compression: Optional[Tuple[Codec, int]] = \
+            check_compress(compress, compress_above)
+        check_max_items(max_items)
+        depends: Optional[tuple] = check_depends(depends_on, check_interval)
+
         self.__ttl = ttl
-        self.__primary_lock__ = threading.Lock()
-        self.__cache_pool__: FuncCachePool = {}
+        self.__max_items = max_items
+        self.__depends = depends
+        self.__normalize = normalize
+        self.__key = key
+        self.__store: Optional[DiskStore] = select_store(disk, shared)
+        self.__tags: Optional[Callable[..., Iterable]] = tags_function(tags)
+        self.__cache_stats__ = Stats()
+        self.__cache_pool__: FuncCachePool = \
+            CachePool(
+                maxsize, eviction, sweep, self.__cache_stats__, swr, jitter,
+                early_expiration, max_bytes, sizer
+            )
+        self.__primary_lock__ = self.__cache_pool__.lock
+        if errors is not None:
+            self.__cache_pool__.keep_errors(*errors)
+        if compression is not None:
+            self.__cache_pool__.compress(*compression)
 
     def __call__(self, func: Wrapped, /) -> WrappedClosure:
         self.__func__ = func
+        if self.__key is None and self.__normalize:
+            self.__key = signature_key(func)
 
         if asyncio.iscoroutinefunction(getattr(func, '__wrapped__', func)):
             self.core = self.acore
+        elif is_generator_function(func):
+            check_stream_store(func, self.__store)
+            self.__stream = streaming(func, self.__max_items)
+            self.core = self.gcore
+
+        if self.__cache_pool__.codec is not None:
+            self.core = unpacking(
+                self.core, self.__cache_pool__.codec, self.__cache_stats__
+            )
+        if self.__depends is not None:
+            self.__cache_pool__.depends = {}
+            self.core = validating(self.core, self, *self.__depends, skip=1)
+
+        if self.__store is not None:
+            self.__cache_pool__.attach(
+                self.__store, f'{func.__module__}.{func.__qualname__}'
+            )
 
         @functools.wraps(func, updated=('__dict__', '__globals__'))
         def inner(*a, **kw) -> Any:
             return self.core(func, *a, **kw)
 
         inner.__cache_pool__ = self.__cache_pool__
+        inner.__cache_stats__ = self.__cache_stats__
+        inner.__function_caller__ = self
 
         return inner
 
+    def cache_key(self, *a, **kw) -> Any:
+        if self.__key is None:
+            return a, frozenset(kw.items()) if kw else nokw
+        return self.__key(*a, **kw)
+
+    def gcore(
+            self, func: Wrapped, /, *a, **kw
+    ) -> Union[Iterator, AsyncIterator]:
+        return replay(
+            self, FunctionCallerTTL.core(self, self.__stream, *a, **kw), func,
+            a, kw
+        )
+
     def core(self, func: Wrapped, /, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
-        cache: Dict[str, Any] = self.__cache_pool__.get(key)
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
+        else:
+            key = self.__key(*a, **kw)
+        entry: Optional[TTLEntry] = self.__cache_pool__.get(key)
+
+        if entry is None or entry.expires < time.monotonic():
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return self.__cache_pool__.load(
+                key, TTLEntry, lambda: func(*a, **kw), self.__ttl,
+                self.__cache_stats__
+            )
 
-        if not cache:
-            with self.__primary_lock__:
-                if key not in self.__cache_pool__:
-                    cache = self.__cache_pool__[key] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__expiration_time__': 0
-                    }
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
-        if cache['__expiration_time__'] < time.monotonic():
-            with cache['__secondary_lock__']:
-                if cache['__expiration_time__'] < time.monotonic():
-                    cache['__return__'] = func(*a, **kw)
-                    cache['__expiration_time__'] = time.monotonic() + self.__ttl
+        self.__cache_stats__.hit(key)
 
-        return cache['__return__']
+        return entry.value
 
     async def acore(self, func: Wrapped, /, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
-        cache: Dict[str, Any] = self.__cache_pool__.get(key)
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
+        else:
+            key = self.__key(*a, **kw)
+        entry: Optional[TTLEntry] = self.__cache_pool__.get(key)
+
+        if entry is None or entry.expires < time.monotonic():
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return await self.__cache_pool__.aload(
+                key, TTLEntry, lambda: func(*a, **kw), self.__ttl,
+                self.__cache_stats__
+            )
 
-        if not cache:
-            with self.__primary_lock__:
-                if key not in self.__cache_pool__:
-                    cache = self.__cache_pool__[key] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__expiration_time__': 0
-                    }
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
-        if cache['__expiration_time__'] < time.monotonic():
-            with cache['__secondary_lock__']:
-                if cache['__expiration_time__'] < time.monotonic():
-                    cache['__return__'] = await func(*a, **kw)
-                    cache['__expiration_time__'] = time.monotonic() + self.__ttl
+        self.__cache_stats__.hit(key)
 
-        return cache['__return__']
+        return entry.value
 
 
 class FunctionCallerCount:
 
-    def __init__(self, count: int = 0, /):
-        if count.__class__ is not int:
+    def __init__(
+            self,
+            count:     Optional[int] = None,
+            /, *,
+            maxsize:   Optional[int] = None,
+            eviction:  Eviction      = 'LRU',
+            normalize: bool          = False,
+            key:       Optional[Callable[..., Hashable]] = None,
+            max_bytes: Optional[int] = None,
+            sizer:     Optional[Callable[[Any], int]] = None,
+            max_items: Optional[int] = None,
+            cache_exceptions: Optional[Exceptions] = None,
+            exception_ttl:    TTL                  = 1,
+            compress:         Optional[Codec]      = None,
+            compress_above:   int                  = 1024,
+            depends_on:       Optional[Depends]    = None,
+            check_interval:   Union[int, float]    = 1,
+            tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+    ):
+        if not (count is None or count.__class__ is int):
             x: str = count.__class__.__name__
             raise TypeError(
                 f'parameter "count" type must be an int, not "{x}".'
             )
-        self.__count = count
-        self.__primary_lock__ = threading.Lock()
-        self.__cache_pool__: FuncCachePool = {}
+        check_maxsize_and_eviction(maxsize, eviction)
+        check_max_bytes(max_bytes, sizer)
+        errors: Optional[Tuple[tuple, Union[int, float]]] = \
+            check_cache_exceptions(cache_exceptions, exception_ttl)
+        compression: Optional[Tuple[Codec, int]] = \
+            check_compress(compress, compress_above)
+        check_max_items(max_items)
+        depends: Optional[tuple] = check_depends(depends_on, check_interval)
+
+        # None never expires: `itertools.count(1)` never reaches `sys.maxsize`,
+        # while an entry not computed yet draws it from `exhausted`.
+        self.__count = sys.maxsize if count is None else count
+        self.__max_items = max_items
+        self.__depends = depends
+        self.__normalize = normalize
+        self.__key = key
+        self.__tags: Optional[Callable[..., Iterable]] = tags_function(tags)
+        self.__cache_stats__ = Stats()
+        self.__cache_pool__: FuncCachePool = CachePool(
+            maxsize, eviction, None, self.__cache_stats__, None, 0, 0,
+            max_bytes, sizer
+        )
+        self.__primary_lock__ = self.__cache_pool__.lock
+        if errors is not None:
+            self.__cache_pool__.keep_errors(*errors)
+        if compression is not None:
+            self.__cache_pool__.compress(*compression)
 
     def __call__(self, func: Wrapped, /) -> WrappedClosure:
         self.__func__ = func
+        if self.__key is None and self.__normalize:
+            self.__key = signature_key(func)
 
         if asyncio.iscoroutinefunction(getattr(func, '__wrapped__', func)):
             self.core = self.acore
+        elif is_generator_function(func):
+            self.__stream = streaming(func, self.__max_items)
+            self.core = self.gcore
+
+        if self.__cache_pool__.codec is not None:
+            self.core = unpacking(
+                self.core, self.__cache_pool__.codec, self.__cache_stats__
+            )
+        if self.__depends is not None:
+            self.__cache_pool__.depends = {}
+            self.core = validating(self.core, self, *self.__depends, skip=1)
 
         @functools.wraps(func, updated=('__dict__', '__globals__'))
         def inner(*a, **kw) -> Any:
             return self.core(func, *a, **kw)
 
         inner.__cache_pool__ = self.__cache_pool__
+        inner.__cache_stats__ = self.__cache_stats__
+        inner.__function_caller__ = self
 
         return inner
 
+    def cache_key(self, *a, **kw) -> Any:
+        if self.__key is None:
+            return a, frozenset(kw.items()) if kw else nokw
+        return self.__key(*a, **kw)
+
+    def gcore(
+            self, func: Wrapped, /, *a, **kw
+    ) -> Union[Iterator, AsyncIterator]:
+        return replay(
+            self, FunctionCallerCount.core(self, self.__stream, *a, **kw),
+            func, a, kw
+        )
+
     def core(self, func: Wrapped, /, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
-        cache: Dict[str, Any] = self.__cache_pool__.get(key)
-
-        if not cache:
-            with self.__primary_lock__:
-                if key not in self.__cache_pool__:
-                    cache = self.__cache_pool__[key] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__count__': self.__count
-                    }
-
-        if cache['__count__'] == self.__count:
-            with cache['__secondary_lock__']:
-                if cache['__count__'] == self.__count:
-                    cache['__return__'] = func(*a, **kw)
-                    cache['__count__'] = 1
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
         else:
-            cache['__count__'] += 1
+            key = self.__key(*a, **kw)
+        entry: Optional[CountEntry] = self.__cache_pool__.get(key)
+
+        if entry is None or next(entry.calls) >= self.__count:
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return self.__cache_pool__.load(
+                key, CountEntry, lambda: func(*a, **kw), self.__count,
+                self.__cache_stats__
+            )
+
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
-        return cache['__return__']
+        self.__cache_stats__.hit(key)
+
+        return entry.value
 
     async def acore(self, func: Wrapped, /, *a, **kw) -> WrappedReturn:
-        key = a, frozenset(kw.items())
-        cache: Dict[str, Any] = self.__cache_pool__.get(key)
-
-        if not cache:
-            with self.__primary_lock__:
-                if key not in self.__cache_pool__:
-                    cache = self.__cache_pool__[key] = {
-                        '__secondary_lock__': threading.Lock(),
-                        '__count__': self.__count
-                    }
-
-        if cache['__count__'] == self.__count:
-            with cache['__secondary_lock__']:
-                if cache['__count__'] == self.__count:
-                    cache['__return__'] = await func(*a, **kw)
-                    cache['__count__'] = 1
+        if self.__key is None:
+            key = a, frozenset(kw.items()) if kw else nokw
         else:
-            cache['__count__'] += 1
+            key = self.__key(*a, **kw)
+        entry: Optional[CountEntry] = self.__cache_pool__.get(key)
+
+        if entry is None or next(entry.calls) >= self.__count:
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(*a, **kw))
+            return await self.__cache_pool__.aload(
+                key, CountEntry, lambda: func(*a, **kw), self.__count,
+                self.__cache_stats__
+            )
 
-        return cache['__return__']
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
 
+        self.__cache_stats__.hit(key)
 
-def __getattribute__(cls: FuncCache, /) -> Callable:
-    def inner(ins: cls, attr: str, /) -> Any:
-        sget: Callable[[str], Any] = super(cls, ins).__getattribute__
+        return entry.value
 
-        if (
-                attr in ('__cache_pool__', '__not_cache__') or
-                attr in cls.__not_cache__ or
-                attr not in cls.__dict__
+
+class FunctionCallerBatch:
+    """Decorates a coroutine function taking a list of keys and returning
+    their values, as a list in the same order or as a mapping. The decorated
+    function takes one key, cached keys are returned from `__cache_pool__`,
+    and the missing keys requested within `window` seconds (or the same turn
+    of the event loop by default) are loaded by a single call, at most
+    `max_batch` keys at a time."""
+
+    def __init__(
+            self,
+            ttl:       TTL               = float('inf'),
+            /, *,
+            window:    Union[int, float] = 0,
+            max_batch: Optional[int]     = None,
+            maxsize:   Optional[int]     = None,
+            eviction:  Eviction          = 'LRU',
+            max_bytes: Optional[int]     = None,
+            sizer:     Optional[Callable[[Any], int]] = None,
+            cache_exceptions: Optional[Exceptions] = None,
+            exception_ttl:    TTL                  = 1,
+            compress:         Optional[Codec]      = None,
+            compress_above:   int                  = 1024,
+            tags:      Optional[Union[Callable[..., Iterable], Iterable]] = None
+    ):
+        if isinstance(ttl, str):
+            ttl = time2second(ttl)
+        elif not isinstance(ttl, (int, float)):
+            raise TypeError(
+                'parameter "ttl" is expected to be of type int or float, '
+                f'not {ttl!r}.'
+            )
+
+        if not (window.__class__ in (int, float) and window >= 0):
+            raise ValueError(
+                'parameter "window" is expected to be a non-negative number, '
+                f'not {window!r}.'
+            )
+
+        if not (
+                max_batch is None
+                or max_batch.__class__ is int and max_batch > 0
         ):
-            return sget(attr)
+            raise ValueError(
+                'parameter "max_batch" is expected to be a positive int, '
+                f'not {max_batch!r}.'
+            )
 
-        value: Any = getattr(cls, attr)
+        check_maxsize_and_eviction(maxsize, eviction)
+        check_max_bytes(max_bytes, sizer)
+        errors: Optional[Tuple[tuple, Union[int, float]]] = \
+            check_cache_exceptions(cache_exceptions, exception_ttl)
+        compression: Optional[Tuple[Codec, int]] = \
+            check_compress(compress, compress_above)
 
-        if not (callable(value) or value.__class__ in (property, classmethod)):
-            return sget(attr)
+        self.__ttl = ttl
+        self.__tags: Optional[Callable[..., Iterable]] = tags_function(tags)
+        self.__window = window
+        self.__max_batch = max_batch
+        self.__batches: Dict[
+            asyncio.AbstractEventLoop,
+            Tuple[List[Tuple[Any, 'TTLEntry', asyncio.Future]], asyncio.Handle]
+        ] = {}
+        self.__tasks: Set[asyncio.Task] = set()
+        self.__cache_stats__ = Stats()
+        self.__cache_pool__: FuncCachePool = CachePool(
+            maxsize, eviction, None, self.__cache_stats__, None, 0, 0,
+            max_bytes, sizer
+        )
+        self.__primary_lock__ = self.__cache_pool__.lock
+        if errors is not None:
+            self.__cache_pool__.keep_errors(*errors)
+        if compression is not None:
+            self.__cache_pool__.compress(*compression)
+            self.core = unpacking(
+                self.core, compression[0], self.__cache_stats__
+            )
 
-        return MethodCaller(cls, sget, attr, value)
+    def __call__(self, func: Wrapped, /) -> WrappedClosure:
+        if not asyncio.iscoroutinefunction(getattr(func, '__wrapped__', func)):
+            raise TypeError(
+                f'"{func.__module__}.{func.__qualname__}" is expected to be '
+                'a coroutine function.'
+            )
 
-    return inner
+        self.__func__ = func
 
+        @functools.wraps(func, updated=('__dict__', '__globals__'))
+        async def inner(key: Hashable, /) -> Any:
+            return await self.core(key)
 
-def clear_cache_pool(func: Union[
-        FunctionCaller, FunctionCallerTTL, Type[object], FuncCache
-], /) -> None:
-    try:
-        func.__cache_pool__.clear()
-    except AttributeError:
-        raise TypeError(
-            f'"{func.__module__}.{func.__qualname__}" is not cached.'
-        ) from None
+        inner.__cache_pool__ = self.__cache_pool__
+        inner.__cache_stats__ = self.__cache_stats__
+        inner.__function_caller__ = self
+
+        return inner
+
+    @staticmethod
+    def cache_key(key: Hashable, /) -> Hashable:
+        return key
+
+    async def core(self, key: Hashable, /) -> WrappedReturn:
+        entry: Optional[TTLEntry] = self.__cache_pool__.get(key)
+
+        if entry is None or entry.expires < time.monotonic():
+            if self.__tags is not None:
+                self.__cache_pool__.tag(key, self.__tags(key))
+            return await self.load(key)
+
+        if self.__cache_pool__.eviction is not None:
+            self.__cache_pool__.eviction.hit(key)
+
+        self.__cache_stats__.hit(key)
+
+        return entry.value
+
+    async def load(self, key: Hashable, /) -> WrappedReturn:
+        # Like `CachePool.aload`, except that `entry.flight` is a future of
+        # the batch the key is added to.
+        pool: CachePool = self.__cache_pool__
+        if pool.errors:
+            pool.raise_error(key, self.__cache_stats__)
+        self.__cache_stats__.missed(key)
+        entry: Optional[TTLEntry] = pool.get(key)
+
+        if entry is None:
+            with key_lock(key):
+                entry = pool.ensure(key, TTLEntry)
+
+        loop = asyncio.get_running_loop()
+        future: Optional[asyncio.Future] = entry.flight
+
+        if future is None or future.get_loop() is not loop:
+            if future is None and not entry.stale():
+                return entry.value
+            if entry.value is not missing:
+                next(self.__cache_stats__.expirations)
+            future = entry.flight = self.enqueue(loop, key, entry)
+
+        return await asyncio.shield(future)
+
+    def enqueue(
+            self, loop: asyncio.AbstractEventLoop, key: Hashable,
+            entry: 'TTLEntry', /
+    ) -> asyncio.Future:
+        future: asyncio.Future = loop.create_future()
+
+        try:
+            batch, _ = self.__batches[loop]
+        except KeyError:
+            batch = []
+            self.__batches[loop] = batch, loop.call_later(
+                self.__window, self.flush, loop
+            )
+
+        batch.append((key, entry, future))
+
+        if len(batch) == self.__max_batch:
+            self.flush(loop)
+
+        return future
+
+    def flush(self, loop: asyncio.AbstractEventLoop, /) -> None:
+        batch, timer = self.__batches.pop(loop)
+        timer.cancel()
+
+        task: asyncio.Task = loop.create_task(
+            self.__func__([key for key, _, _ in batch])
+        )
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        task.add_done_callback(
+            functools.partial(self.fan_out, batch, time.perf_counter())
+        )
+
+    def fan_out(
+            self,
+            batch: List[Tuple[Any, 'TTLEntry', asyncio.Future]],
+            start: float,
+            task:  asyncio.Task,
+            /
+    ) -> None:
+        # Each key gets its own value, or the exception of the whole batch.
+        pool: CachePool = self.__cache_pool__
+        seconds: float = time.perf_counter() - start
+        error: Optional[BaseException] = None
+        values: Any = None
+
+        if task.cancelled():
+            error = asyncio.CancelledError()
+        elif task.exception() is not None:
+            error = task.exception()
+        else:
+            values = task.result()
+            if not isinstance(values, Mapping):
+                values = list(values)
+                if len(values) != len(batch):
+                    error = ValueError(
+                        f'"{self.__func__.__module__}.'
+                        f'{self.__func__.__qualname__}" returned '
+                        f'{len(values)} values for {len(batch)} keys.'
+                    )
+            if error is None:
+                self.__cache_stats__.computed(
+                    tuple(key for key, _, _ in batch), seconds
+                )
+
+        for index, (key, entry, future) in enumerate(batch):
+            key_error: Optional[BaseException] = error
+            if key_error is None:
+                try:
+                    value: Any = values[index] \
+                        if values.__class__ is list else values[key]
+                except KeyError:
+                    key_error = KeyError(key)
+                else:
+                    entry.done(pool, key, value, self.__ttl, seconds)
+            if key_error is not None:
+                with pool.lock:
+                    pool.fail(
+                        key, entry, None if task.cancelled() else key_error
+                    )
+            if entry.flight is future:
+                entry.flight = None
+            if future.done():
+                continue
+            if key_error is None:
+                future.set_result(value)
+            elif task.cancelled():
+                future.cancel()
+            else:
+                future.set_exception(key_error)
+
+
+class Entry:
+    """An entry of `__cache_pool__`. The attribute `flight` holds a lock (or
+    an `asyncio.Task` for coroutine functions) only while the value is being
+    computed, and is None otherwise."""
+    __slots__ = ('value', 'flight')
+
+    def __init__(self):
+        self.value: Any = missing
+        self.flight: Optional[Union[threading.Lock, asyncio.Task]] = None
+
+    def stale(self, _=None, /) -> bool:
+        return self.value is missing
+
+    def done(
+            self, pool: 'CachePool', key: Any, value: Any, _, seconds: float, /
+    ) -> None:
+        self.value = value if pool.codec is None else pool.pack(key, value)
+        if pool.max_bytes is not None:
+            pool.weigh(key, self)
+
+
+class TTLEntry(Entry):
+    """The value is recomputed once `expires` is reached, until `deadline`
+    (0 if none) it may still be returned while being recomputed."""
+    __slots__ = ('expires', 'deadline')
+
+    def __init__(self):
+        Entry.__init__(self)
+        self.expires: float = 0
+        self.deadline: float = 0
+
+    def stale(self, _=None, /) -> bool:
+        return self.expires < time.monotonic()
+
+    def done(
+            self, pool: 'CachePool', key: Any, value: Any, ttl: TTL,
+            seconds: float, /
+    ) -> None:
+        self.value = value if pool.codec is None else pool.pack(key, value)
+        self.expires, self.deadline = pool.lifetime(ttl, seconds)
+        pool.expire_at(key, self.deadline or self.expires)
+        if pool.max_bytes is not None:
+            pool.weigh(key, self)
+
+
+class CountEntry(Entry):
+    """Each call after the one that computed the value draws the next number
+    from `calls`, which is an `itertools.count`: drawing is a single call into
+    C, so concurrent callers never draw the same number. The caller drawing
+    the `count`th number and those after it find the entry stale, one of them
+    recomputes it while the others wait, then draw from the new `calls`."""
+    __slots__ = ('calls',)
+
+    def __init__(self):
+        Entry.__init__(self)
+        self.calls: Iterator[int] = exhausted
+
+    def stale(self, count: int, /) -> bool:
+        return next(self.calls) >= count
+
+    def done(
+            self, pool: 'CachePool', key: Any, value: Any, _, seconds: float, /
+    ) -> None:
+        self.value = value if pool.codec is None else pool.pack(key, value)
+        self.calls = itertools.count(1)
+        if pool.max_bytes is not None:
+            pool.weigh(key, self)
+
+
+class EvictionPolicy:
+    """Base class of the eviction policies of a bounded cache pool. Every
+    method is expected to run in O(1), `evict` returns the key to be dropped
+    next and raises `KeyError` when nothing is tracked."""
+
+    def insert(self, key: Any, /) -> None:
+        raise NotImplementedError
+
+    def hit(self, key: Any, /) -> None:
+        raise NotImplementedError
+
+    def remove(self, key: Any, /) -> None:
+        raise NotImplementedError
+
+    def evict(self) -> Any:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class FIFO(EvictionPolicy):
+
+    def __init__(self):
+        self.order: OrderedDict = OrderedDict()
+
+    def insert(self, key: Any, /) -> None:
+        self.order[key] = None
+
+    def hit(self, key: Any, /) -> None:
+        pass
+
+    def remove(self, key: Any, /) -> None:
+        self.order.pop(key, None)
+
+    def evict(self) -> Any:
+        return self.order.popitem(last=False)[0]
+
+    def clear(self) -> None:
+        self.order.clear()
+
+
+class LRU(FIFO):
+
+    def hit(self, key: Any, /) -> None:
+        try:
+            self.order.move_to_end(key)
+        except KeyError:
+            pass  # Evicted by a concurrent caller.
+
+
+class LFU(EvictionPolicy):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.freq: Dict[Any, int] = {}
+        self.buckets: Dict[int, Dict[Any, None]] = {}
+        self.min_freq = 0
+
+    def insert(self, key: Any, /) -> None:
+        with self.lock:
+            self.freq[key] = 1
+            self.buckets.setdefault(1, {})[key] = None
+            self.min_freq = 1
+
+    def hit(self, key: Any, /) -> None:
+        with self.lock:
+            freq: Optional[int] = self.freq.get(key)
+            if freq is None:
+                return
+            bucket: Dict[Any, None] = self.buckets[freq]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[freq]
+                if self.min_freq == freq:
+                    self.min_freq = freq + 1
+            self.freq[key] = freq + 1
+            self.buckets.setdefault(freq + 1, {})[key] = None
+
+    def remove(self, key: Any, /) -> None:
+        with self.lock:
+            freq: Optional[int] = self.freq.pop(key, None)
+            if freq is None:
+                return
+            bucket: Dict[Any, None] = self.buckets[freq]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[freq]
+
+    def evict(self) -> Any:
+        with self.lock:
+            if self.min_freq not in self.buckets:
+                # Only after `remove`, the minimum has to be searched again.
+                self.min_freq = min(self.buckets)
+            bucket: Dict[Any, None] = self.buckets[self.min_freq]
+            key: Any = next(iter(bucket))
+            del bucket[key]
+            if not bucket:
+                del self.buckets[self.min_freq]
+            del self.freq[key]
+            return key
+
+    def clear(self) -> None:
+        with self.lock:
+            self.freq.clear()
+            self.buckets.clear()
+            self.min_freq = 0
+
+
+eviction_policies: Dict[str, Type[EvictionPolicy]] = {
+    'LRU': LRU, 'LFU': LFU, 'FIFO': FIFO
+}
+
+
+class CachePool(dict):
+    """The `__cache_pool__`, a missing key is added through `ensure` while
+    holding the lock of its stripe, and through `add` while also holding `lock`
+    if the pool evicts or expires keys. If `maxsize` is specified, the eviction
+    policy keeps the number of keys within `maxsize`. Keys registered by
+    `expire_at` are removed once expired, lazily on the next `add`, or every
+    `sweep` seconds by the daemon thread `sweeper`. For `grace` seconds after
+    expiration, the stale value is still returned while it is refreshed in the
+    background. `jitter` and `early` spread the expiration of keys computed at
+    the same time. A pool attached to a `DiskStore` looks a missing key up
+    there before computing it, and writes each computed value there. A
+    `SharedStore` also lets only one process compute a missing key. Once a key
+    is tagged, `tags` maps each tag to its keys, and `tagged` each key to its
+    tags. If `max_bytes` is specified, `sizer` estimates each value once it is
+    computed, `sizes` keeps the estimate of each key and `nbytes` their sum,
+    which the eviction policy keeps within `max_bytes`. `quotas` limits the
+    keys of some methods of a `funccache` class to their own maxsize, each with
+    its own policy. Once `keep_errors` is called, `errors` keeps the exceptions
+    of `error_types` a computation raised, re-raised on a miss of their key for
+    `error_ttl` seconds. Once `compress` is called, `str` and `bytes` values
+    larger than `compress_above` bytes are stored compressed by `codec`. The
+    keys of a function with dependencies have their fingerprints in `depends`,
+    see `validating`."""
+    __slots__ = (
+        'lock', 'maxsize', 'eviction', 'expiry', 'stats', 'grace', 'jitter',
+        'early', 'store', 'namespace', 'tags', 'tagged', 'max_bytes', 'sizer',
+        'sizes', 'nbytes', 'quotas', 'errors', 'error_types', 'error_ttl',
+        'codec', 'compress_above', 'depends', '__weakref__'
+    )
+
+    __counter = itertools.count()
+
+    def __init__(
+            self,
+            maxsize:  Optional[int]                           = None,
+            eviction: Eviction                                = 'LRU',
+            sweep:    Optional[TTL]                           = None,
+            stats:    Optional[Union['Stats', Dict[str, 'Stats']]] = None,
+            grace:    Optional[TTL]                           = None,
+            jitter:   Union[int, float]                       = 0,
+            early:    Union[int, float]                       = 0,
+            max_bytes: Optional[int]                          = None,
+            sizer:    Optional[Callable[[Any], int]]          = None,
+            quotas:   Optional[Dict[str, int]]                = None,
+            /
+    ):
+        dict.__init__(self)
+        self.lock = threading.Lock()
+        self.maxsize: Optional[int] = maxsize
+        self.expiry: List[Tuple[float, int, Any]] = []
+        self.stats: Union[Stats, Dict[str, Stats]] = \
+            Stats() if stats is None else stats
+        self.grace: Union[int, float] = grace or 0
+        self.jitter: Union[int, float] = jitter
+        self.early: Union[int, float] = early
+        self.store: Optional[DiskStore] = None
+        self.namespace: str = ''
+        self.tags: Optional[Dict[Hashable, Set[Any]]] = None
+        self.tagged: Optional[Dict[Any, FrozenSet[Hashable]]] = None
+        self.max_bytes: Optional[int] = max_bytes
+        self.sizer: Callable[[Any], int] = sizer or sizeof
+        self.sizes: Optional[Dict[Any, int]] = \
+            None if max_bytes is None else {}
+        self.nbytes: int = 0
+        self.errors: Optional[
+            Dict[Any, Tuple[BaseException, Any, float]]
+        ] = None
+        self.error_types: Tuple[Type[BaseException], ...] = ()
+        self.error_ttl: Union[int, float] = 0
+        self.codec: Optional[Codec] = None
+        self.compress_above: int = 0
+        self.depends: Optional[Dict[Any, list]] = None
+
+        if sweep is not None:
+            sweeper.register(self, sweep)
+
+        if eviction.__class__ is str:
+            eviction = eviction_policies[eviction.upper()]
+
+        if maxsize is None and max_bytes is None and not quotas:
+            self.eviction: Optional[EvictionPolicy] = None
+        else:
+            self.eviction = eviction()
+
+        self.quotas: Optional[Dict[str, Quota]] = {
+            name: Quota(n, eviction()) for name, n in quotas.items()
+        } if quotas else None
+
+    def add(self, key: Any, value: Any, /) -> None:
+        # The caller holds `lock`.
+        if self.expiry and self.expiry[0][0] < time.monotonic():
+            self.purge()
+
+        if self.eviction is None:
+            self[key] = value
+            return
+
+        quota: Optional[Quota] = None if self.quotas is None else \
+            self.quotas.get(key[0] if key.__class__ is tuple else key)
+
+        if quota is not None:
+            while quota.size >= quota.maxsize and self.evict(quota):
+                pass
+            if quota.maxsize == 0:
+                return
+
+        if self.maxsize is not None:
+            while self and len(self) >= self.maxsize and self.evict():
+                pass
+
+        if self.maxsize != 0:
+            self[key] = value
+            self.eviction.insert(key)
+            if quota is not None:
+                quota.eviction.insert(key)
+                quota.size += 1
+
+    def evict(self, quota: Optional['Quota'] = None, /) -> bool:
+        # The caller holds `lock`. Drop the victim of the eviction policy, or
+        # of `quota`, return False if there is none.
+        eviction: EvictionPolicy = \
+            self.eviction if quota is None else quota.eviction
+        try:
+            victim: Any = eviction.evict()
+        except (KeyError, ValueError, StopIteration):
+            return False
+        if self.pop(victim, missing) is not missing:
+            self.forget(victim, eviction)
+            stats: Optional[Stats] = self.route(victim)
+            if stats is not None:
+                next(stats.evictions)
+        return True
+
+    def weigh(self, key: Any, entry: 'Entry', /) -> None:
+        # Called once `entry` is done, the value is estimated outside `lock`.
+        # A value larger than `max_bytes` is returned but not kept, without
+        # evicting others for it. Otherwise keys are evicted until the pool
+        # fits `max_bytes`.
+        size: int = self.sizer(entry.value)
+        with self.lock:
+            if self.get(key) is not entry:
+                return
+            if size > self.max_bytes:
+                self.remove(key)
+                stats: Optional[Stats] = self.route(key)
+                if stats is not None:
+                    next(stats.evictions)
+                return
+            self.nbytes += size - self.sizes.get(key, 0)
+            self.sizes[key] = size
+            while self.nbytes > self.max_bytes and self.evict():
+                pass
+
+    def ensure(self, key: Any, entry_class: Type['Entry'], /) -> 'Entry':
+        # The caller holds `key_lock(key)`, so concurrent misses on different
+        # keys do not wait for each other. Only a pool that evicts keys takes
+        # `lock` to add one, others add it as a single dict store. Expired keys
+        # are purged by `expire_at`, when a computed value is registered.
+        entry: Optional[Entry] = self.get(key)
+        if entry is None:
+            entry = entry_class()
+            if self.eviction is None:
+                self[key] = entry
+            else:
+                with self.lock:
+                    self.add(key, entry)
+        return entry
+
+    def expire_at(self, key: Any, expiration_time: float, /) -> None:
+        # A key recomputed while still in the pool is registered again, the
+        # outdated registrations are dropped once expired, or by `compact` if
+        # they outnumber the keys, so the heap stays within the pool's size.
+        if expiration_time != inf:
+            with self.lock:
+                if self.expiry and self.expiry[0][0] < time.monotonic():
+                    self.purge()
+                if len(self.expiry) > 2 * len(self):
+                    self.compact()
+                heapq.heappush(
+                    self.expiry, (expiration_time, next(self.__counter), key)
+                )
+
+    def lifetime(
+            self, ttl: TTL, seconds: float, /
+    ) -> Tuple[float, Union[int, float]]:
+        # Return when a value computed now in `seconds` expires, and until when
+        # it may be returned while being recomputed. The jitter scales `ttl`
+        # by a random factor in [1 - jitter, 1 + jitter]. The early expiration
+        # is XFetch drawn once per computation: the value is recomputed in the
+        # background `seconds * early * Exp(1)` before it actually expires, so
+        # slow computations start earlier and keys filled together spread out.
+        now: float = time.monotonic()
+
+        if self.jitter:
+            ttl *= 1 + self.jitter * (2 * random.random() - 1)
+
+        expires: float = now + ttl
+        deadline: Union[int, float] = expires + self.grace if self.grace else 0
+
+        if self.early and expires != inf:
+            deadline = max(deadline, expires)
+            expires = max(
+                expires + seconds * self.early * math.log(1 - random.random()),
+                now
+            )
+
+        return expires, deadline
+
+    def purge(self) -> None:
+        # The caller holds `lock`. An entry refreshed after it was registered
+        # is registered again, so the outdated registration is only dropped.
+        now: float = time.monotonic()
+        while self.expiry and self.expiry[0][0] < now:
+            expiration_time, _, key = heapq.heappop(self.expiry)
+            entry: Optional[TTLEntry] = self.get(key)
+            if (
+                    entry is not None
+                    and (entry.deadline or entry.expires) == expiration_time
+                    and entry.flight is None
+            ):
+                self.remove(key)
+                stats: Optional[Stats] = self.route(key)
+                if stats is not None:
+                    next(stats.expirations)
+
+    def compact(self) -> None:
+        # The caller holds `lock`. Keep the current registration of each key,
+        # those expired are dropped by the next `purge`.
+        self.expiry[:] = [
+            record for record in self.expiry
+            if (entry := self.get(record[2])) is not None
+            and (entry.deadline or entry.expires) == record[0]
+        ]
+        heapq.heapify(self.expiry)
+
+    def load(
+            self,
+            key:         Any,
+            entry_class: Type['Entry'],
+            compute:     Callable[[], Any],
+            arg:         Any,
+            stats:       'Stats',
+            /
+    ) -> Any:
+        # Called on a miss, the first caller becomes the owner of the flight
+        # lock and computes, the others wait for the lock to be released and
+        # then look again. An entry that never got a value is discarded when
+        # the computation fails, so the next caller computes again.
+        if (self.grace or self.early) and entry_class is TTLEntry:
+            entry: Optional[TTLEntry] = self.get(key)
+            if entry is not None and self.serve_stale(entry):
+                self.revalidate(key, entry, compute, arg, stats)
+                stats.hit(key)
+                return entry.value
+
+        if self.errors:
+            self.raise_error(key, stats)
+
+        stats.missed(key)
+        lock: threading.Lock = key_lock(key)
+
+        while True:
+            with lock:
+                entry: Entry = self.ensure(key, entry_class)
+                flight: Optional[threading.Lock] = entry.flight
+                if flight is None:
+                    if not entry.stale(arg):
+                        return entry.value
+                    flight = entry.flight = threading.Lock()
+                    flight.acquire()
+                    break
+            with flight:
+                pass
+            # The computation waited for failed with an exception kept.
+            if self.errors:
+                self.raise_error(key, None)
+
+        if entry.value is not missing:
+            next(stats.expirations)
+
+        return self.fill(key, entry, flight, compute, arg, stats)
+
+    def fill(
+            self,
+            key:     Any,
+            entry:   'Entry',
+            flight:  threading.Lock,
+            compute: Callable[[], Any],
+            arg:     Any,
+            stats:   'Stats',
+            /
+    ) -> Any:
+        # The caller owns `flight`, which is released once the entry is done.
+        if self.store is not None and self.restore(key, entry, arg):
+            entry.flight = None
+            flight.release()
+            return entry.value
+
+        start: float = time.perf_counter()
+
+        try:
+            value: Any = compute()
+        except BaseException as e:
+            with self.lock:
+                entry.flight = None
+                self.fail(key, entry, e)
+            flight.release()
+            if self.store is not None:
+                self.store.release(self.namespace, key)
+            raise
+
+        seconds: float = time.perf_counter() - start
+        stats.computed(key, seconds)
+        entry.done(self, key, value, arg, seconds)
+        entry.flight = None
+        flight.release()
+
+        if self.store is not None:
+            self.persist(key, entry, value)
+
+        return value
+
+    @staticmethod
+    def serve_stale(entry: 'TTLEntry', /) -> bool:
+        return entry.value is not missing \
+            and time.monotonic() < entry.deadline
+
+    def revalidate(
+            self,
+            key:     Any,
+            entry:   'TTLEntry',
+            compute: Callable[[], Any],
+            arg:     Any,
+            stats:   'Stats',
+            /
+    ) -> None:
+        # At most one refresh of an entry is in flight. If it fails, the stale
+        # value is kept, and the next caller within `grace` refreshes again.
+        if self.eviction is not None:
+            self.eviction.hit(key)
+
+        with key_lock(key):
+            if entry.flight is not None or not entry.stale(arg):
+                return
+            flight = entry.flight = threading.Lock()
+            flight.acquire()
+
+        next(stats.expirations)
+
+        try:
+            refresher.submit(
+                self.fill, key, entry, flight, compute, arg, stats
+            )
+        except RuntimeError:
+            # The interpreter is shutting down.
+            with key_lock(key):
+                entry.flight = None
+            flight.release()
+
+    async def aload(
+            self,
+            key:         Any,
+            entry_class: Type['Entry'],
+            create:      Callable[[], Awaitable],
+            arg:         Any,
+            stats:       'Stats',
+            /
+    ) -> Any:
+        entry: Optional[Entry] = self.get(key)
+
+        if (self.grace or self.early) and entry_class is TTLEntry \
+                and entry is not None and self.serve_stale(entry):
+            if self.eviction is not None:
+                self.eviction.hit(key)
+            if entry.flight is None and entry.stale(arg):
+                next(stats.expirations)
+                single_flight(
+                    entry, create, self.settle(key, entry, arg, stats)
+                )
+            stats.hit(key)
+            return entry.value
+
+        if self.errors:
+            self.raise_error(key, stats)
+
+        stats.missed(key)
+
+        if entry is None:
+            with key_lock(key):
+                entry = self.ensure(key, entry_class)
+
+        if entry.flight is None:
+            if not entry.stale(arg):
+                return entry.value
+            if self.store is not None and self.restore(
+                    key, entry, arg, wait=False
+            ):
+                return entry.value
+            if entry.value is not missing:
+                next(stats.expirations)
+
+        if self.store is not None:
+            create = functools.partial(self.acompute, key, create)
+
+        while True:
+            waiting: bool = entry.flight is not None
+            value: Any = await asyncio.shield(single_flight(
+                entry, create, self.settle(key, entry, arg, stats)
+            ))
+            if not waiting or entry_class is not CountEntry:
+                return value
+            # As in `load`, a caller that waited is a call of the next round.
+            if entry.flight is None and not entry.stale(arg):
+                return entry.value
+
+    def settle(
+            self, key: Any, entry: 'Entry', arg: Any, stats: 'Stats', /
+    ) -> Callable[[asyncio.Task], None]:
+        start: float = time.perf_counter()
+
+        def callback(task: asyncio.Task, /) -> None:
+            if not (task.cancelled() or task.exception()):
+                seconds: float = time.perf_counter() - start
+                stats.computed(key, seconds)
+                entry.done(self, key, task.result(), arg, seconds)
+                if self.store is not None:
+                    self.persist(key, entry, task.result())
+            else:
+                with self.lock:
+                    self.fail(
+                        key, entry, None if task.cancelled() else
+                        task.exception()
+                    )
+
+        return callback
+
+    def attach(self, store: 'DiskStore', namespace: str, /) -> None:
+        self.store = store
+        self.namespace = namespace
+
+    def restore(
+            self, key: Any, entry: 'Entry', arg: Any, /, *, wait: bool = True
+    ) -> bool:
+        # The caller is about to compute `entry`, look it up in `store` first,
+        # it lives there for the rest of its time to live. Unless it gets the
+        # lease, it waits for the value another process is computing.
+        stored: Optional[Tuple[Any, Optional[float]]] = \
+            self.store.get(self.namespace, key)
+        while stored is None and wait and not self.store.lease(
+                self.namespace, key
+        ):
+            time.sleep(self.store.poll_interval)
+            stored = self.store.get(self.namespace, key)
+        if stored is None:
+            return False
+        value, ttl = stored
+        entry.done(self, key, value, arg if ttl is None else ttl, 0)
+        return True
+
+    async def acompute(
+            self, key: Any, create: Callable[[], Awaitable], /
+    ) -> Any:
+        # `restore` for coroutine functions, waits in the task, without
+        # blocking the loop. A value from another process is then cached with
+        # the full time to live, it was computed just now.
+        while not self.store.lease(self.namespace, key):
+            await asyncio.sleep(self.store.poll_interval)
+            stored: Optional[Tuple[Any, Optional[float]]] = \
+                self.store.get(self.namespace, key)
+            if stored is not None:
+                return stored[0]
+        try:
+            return await create()
+        except BaseException:
+            self.store.release(self.namespace, key)
+            raise
+
+    def persist(self, key: Any, entry: 'Entry', value: Any, /) -> None:
+        # `store` keeps the wall clock expiration time, which survives restarts.
+        expires: float = getattr(entry, 'expires', inf)
+        self.store.put(
+            self.namespace, key, value,
+            None if expires == inf else time.time() + expires - time.monotonic()
+        )
+
+    def route(self, key: Any, /) -> Optional['Stats']:
+        # The pool of a function has its own `Stats`, the pool of a `FuncCache`
+        # class or instance maps the qualified name of each method to its own.
+        if self.stats.__class__ is Stats:
+            return self.stats
+        return self.stats.get(key[0] if key.__class__ is tuple else key)
+
+    def drop(self, key: Any, value: Any, /) -> None:
+        with self.lock:
+            entry: Optional[Entry] = self.get(key)
+            if entry is not None and entry.value is value:
+                self.remove(key)
+
+    def keep_errors(
+            self,
+            types: Tuple[Type[BaseException], ...],
+            ttl:   Union[int, float],
+            /
+    ) -> None:
+        self.errors = OrderedDict()
+        self.error_types = types
+        self.error_ttl = ttl
+
+    def compress(self, codec: Codec, above: int, /) -> None:
+        self.codec = codec
+        self.compress_above = above
+
+    def pack(self, key: Any, value: Any, /) -> Any:
+        # Called with the value of `key` once computed, returns what to store,
+        # a `Packed` if worth compressing, otherwise the value itself.
+        if value.__class__ is bytes:
+            data: bytes = value
+        elif value.__class__ is str:
+            try:
+                data = value.encode()
+            except UnicodeEncodeError:
+                return value
+        else:
+            return value
+        if len(data) <= self.compress_above:
+            return value
+        packed: bytes = self.codec.compress(data)
+        if len(packed) >= len(data):
+            return value
+        stats: Optional[Stats] = self.route(key)
+        if stats is not None:
+            stats.packed(len(data), len(packed))
+        return Packed(packed, value.__class__)
+
+    def fail(
+            self, key: Any, entry: Entry, error: Optional[BaseException], /
+    ) -> None:
+        # The caller holds `lock`. The computation of `entry` raised `error`,
+        # None if cancelled. An entry that never got a value is discarded.
+        if entry.value is missing:
+            self.discard(key, entry)
+        if self.errors is None or not isinstance(error, self.error_types):
+            return
+        # All errors live for `error_ttl`, so the oldest expires first, and
+        # the expired ones are dropped from the front.
+        now: float = time.monotonic()
+        while self.errors and next(iter(self.errors.values()))[2] < now:
+            self.errors.popitem(last=False)
+        self.errors.pop(key, None)
+        self.errors[key] = error, error.__traceback__, now + self.error_ttl
+
+    def raise_error(self, key: Any, stats: Optional['Stats'], /) -> None:
+        # Raise the error kept for `key` unless expired, with the traceback it
+        # was first raised with, so its traceback does not grow on each raise.
+        # The key was tagged by the caller, the tags of a key not in the pool
+        # are dropped, as nothing else would drop them.
+        kept: Optional[Tuple[BaseException, Any, float]] = self.errors.get(key)
+        if kept is not None and time.monotonic() <= kept[2]:
+            if self.tagged is not None and key not in self:
+                with self.lock:
+                    if key not in self:
+                        self.untag(key)
+            if stats is not None:
+                stats.hit(key)
+            raise kept[0].with_traceback(kept[1])
+
+    def discard(self, key: Any, entry: Entry, /) -> None:
+        # The caller holds `lock`.
+        if self.get(key) is entry:
+            self.remove(key)
+
+    def remove(self, key: Any, /) -> None:
+        # The caller holds `lock`.
+        del self[key]
+        self.forget(key)
+
+    def forget(
+            self, key: Any, evicted: Optional[EvictionPolicy] = None, /
+    ) -> None:
+        # The caller holds `lock` and just removed `key`, the policy `evicted`
+        # already dropped it.
+        if self.eviction is not None and self.eviction is not evicted:
+            self.eviction.remove(key)
+        if self.quotas is not None:
+            quota: Optional[Quota] = \
+                self.quotas.get(key[0] if key.__class__ is tuple else key)
+            if quota is not None:
+                if quota.eviction is not evicted:
+                    quota.eviction.remove(key)
+                quota.size -= 1
+        if self.tagged is not None:
+            self.untag(key)
+        if self.sizes is not None:
+            self.nbytes -= self.sizes.pop(key, 0)
+        if self.depends is not None:
+            self.depends.pop(key, None)
+
+    def tag(self, key: Any, tags: Iterable[Hashable], /) -> None:
+        # Called before the key is computed, so invalidating a tag while it is
+        # being computed drops it too.
+        tags = frozenset(tags)
+        if not tags or self.maxsize == 0:
+            return
+        with self.lock:
+            if self.tagged is None:
+                self.tags, self.tagged = {}, {}
+                tagged_pools[id(self)] = self
+            elif self.tagged.get(key) == tags:
+                return
+            else:
+                self.untag(key)
+            self.tagged[key] = tags
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+
+    def untag(self, key: Any, /) -> None:
+        # The caller holds `lock`.
+        for tag in self.tagged.pop(key, ()):
+            keys: Set[Any] = self.tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self.tags[tag]
+
+    def invalidate(self, keys: Iterable[Any], /) -> int:
+        # Remove the keys, and the keys stored in `store` even if not in the
+        # pool, return how many were in the pool. An entry being computed is
+        # removed as well, its value is then dropped once computed.
+        keys = list(keys)
+        removed: List[Any] = []
+
+        with self.lock:
+            for key in keys:
+                if key in self:
+                    self.remove(key)
+                    removed.append(key)
+                elif self.tagged is not None:
+                    self.untag(key)
+                if self.errors:
+                    self.errors.pop(key, None)
+
+        if self.store is not None and keys:
+            self.store.delete(self.namespace, keys)
+
+        return len(removed)
+
+    def clear(self) -> None:
+        with self.lock:
+            dict.clear(self)
+            self.expiry.clear()
+            if self.eviction is not None:
+                self.eviction.clear()
+            if self.tagged is not None:
+                self.tags.clear()
+                self.tagged.clear()
+            if self.sizes is not None:
+                self.sizes.clear()
+                self.nbytes = 0
+            if self.quotas is not None:
+                for quota in self.quotas.values():
+                    quota.eviction.clear()
+                    quota.size = 0
+            if self.errors is not None:
+                self.errors.clear()
+            if self.depends is not None:
+                self.depends.clear()
+        if self.store is not None:
+            self.store.clear(self.namespace)
+
+
+class Quota:
+    """The keys of one method limited to `maxsize` in a shared cache pool."""
+    __slots__ = ('maxsize', 'eviction', 'size')
+
+    def __init__(self, maxsize: int, eviction: EvictionPolicy, /):
+        self.maxsize = maxsize
+        self.eviction = eviction
+        self.size = 0
+
+
+class Stats:
+    """Statistics of one cached function or method. The counters are
+    `itertools.count` objects, `next` on them is a single call into C, so
+    counting from many threads loses nothing and needs no lock."""
+    __slots__ = (
+        'hits', 'misses', 'evictions', 'expirations', 'compute_time', 'lock',
+        'on_hit', 'on_miss', 'on_compute', 'raw_bytes', 'packed_bytes',
+        'decode_time'
+    )
+
+    def __init__(self):
+        self.hits = itertools.count()
+        self.misses = itertools.count()
+        self.evictions = itertools.count()
+        self.expirations = itertools.count()
+        self.compute_time: float = 0.
+        self.lock = threading.Lock()
+        self.on_hit: Optional[Callable[[Any], None]] = None
+        self.on_miss: Optional[Callable[[Any], None]] = None
+        self.on_compute: Optional[Callable[[Any, float], None]] = None
+        self.raw_bytes: int = 0
+        self.packed_bytes: int = 0
+        self.decode_time: float = 0.
+
+    def hit(self, key: Any, /) -> None:
+        next(self.hits)
+        if self.on_hit is not None:
+            self.on_hit(key)
+
+    def missed(self, key: Any, /) -> None:
+        next(self.misses)
+        if self.on_miss is not None:
+            self.on_miss(key)
+
+    def computed(self, key: Any, seconds: float, /) -> None:
+        with self.lock:
+            self.compute_time += seconds
+        if self.on_compute is not None:
+            self.on_compute(key, seconds)
+
+    def packed(self, raw: int, packed: int, /) -> None:
+        with self.lock:
+            self.raw_bytes += raw
+            self.packed_bytes += packed
+
+    def decoded(self, seconds: float, /) -> None:
+        with self.lock:
+            self.decode_time += seconds
+
+    def info(
+            self, size: Optional[int], nbytes: Optional[int] = None, /
+    ) -> 'CacheInfo':
+        # The compression statistics are None until a value is compressed.
+        return CacheInfo(
+            read_count(self.hits), read_count(self.misses),
+            read_count(self.evictions), read_count(self.expirations), size,
+            self.compute_time, nbytes,
+            self.raw_bytes / self.packed_bytes if self.packed_bytes else None,
+            self.decode_time if self.packed_bytes else None
+        )
+
+
+def read_count(counter: itertools.count, /) -> int:
+    # The repr is "count(n)", reading it needs no lock either.
+    return int(repr(counter)[6:-1])
+
+
+class CacheInfo(NamedTuple):
+    hits:         int
+    misses:       int
+    evictions:    int
+    expirations:  int
+    size:         Optional[int]
+    compute_time: float
+    nbytes:       Optional[int] = None
+    compression_ratio: Optional[float] = None
+    decode_time:       Optional[float] = None
+
+
+class WarmInfo(NamedTuple):
+    total:    int
+    computed: int
+    cached:   int
+    failed:   int
+    seconds:  float
+
+
+class Sweeper:
+    """A daemon thread shared by all cache pools specified `sweep`, it removes
+    the expired keys from each pool at its own interval. Pools are referenced
+    weakly, so a garbage collected pool is simply forgotten."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.schedule: List[Tuple[float, int, float, weakref.ref]] = []
+        self.counter = itertools.count()
+        self.thread: Optional[threading.Thread] = None
+
+    def register(self, pool: CachePool, interval: Union[int, float], /) -> None:
+        with self.lock:
+            heapq.heappush(self.schedule, (
+                time.monotonic() + interval, next(self.counter), interval,
+                weakref.ref(pool)
+            ))
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name=f'{__package__}.sweeper', daemon=True
+                )
+                self.thread.start()
+        self.wakeup.set()
+
+    def run(self) -> None:
+        while True:
+            with self.lock:
+                timeout: Optional[float] = \
+                    self.schedule[0][0] - time.monotonic() \
+                    if self.schedule else None
+            if timeout is None or timeout > 0:
+                self.wakeup.wait(timeout)
+                self.wakeup.clear()
+                continue
+            with self.lock:
+                _, _, interval, ref = heapq.heappop(self.schedule)
+            pool: Optional[CachePool] = ref()
+            if pool is None:
+                continue
+            with pool.lock:
+                pool.purge()
+            with self.lock:
+                heapq.heappush(self.schedule, (
+                    time.monotonic() + max(interval, .001), next(self.counter),
+                    interval, ref
+                ))
+            del pool
+
+
+sweeper = Sweeper()
+
+# The pools having tagged keys by their id, looked through by `invalidate_tag`,
+# a pool is a dict so it is not hashable itself.
+tagged_pools: 'weakref.WeakValueDictionary[int, CachePool]' = \
+    weakref.WeakValueDictionary()
+
+# Runs the background refreshes of `stale_while_revalidate`, its threads are
+# only started on the first refresh.
+refresher = ThreadPoolExecutor(thread_name_prefix=f'{__package__}.refresher')
+
+
+class DiskStore:
+    """An SQLite file used as the second tier of the cache pools attached to
+    it. Values are serialized by `serializer` (any object with `dumps` and
+    `loads`) and written in batches by a daemon thread, at most `batch_size`
+    at a time or every `flush_interval` seconds. Once the stored values exceed
+    `max_bytes`, the least recently written are dropped. A failure to read,
+    write or serialize is a miss, the value is then only kept in memory."""
+
+    def __init__(
+            self,
+            path:           Union[str, os.PathLike],
+            /, *,
+            serializer:     Any               = pickle,
+            max_bytes:      Optional[int]     = None,
+            batch_size:     int               = 128,
+            flush_interval: Union[int, float] = 1
+    ):
+        if not (max_bytes is None or max_bytes.__class__ is int):
+            raise TypeError(
+                'parameter "max_bytes" is expected to be of type int, '
+                f'not {max_bytes!r}.'
+            )
+
+        self.path: str = self.locate(path)
+        self.serializer = serializer
+        self.max_bytes: Optional[int] = max_bytes
+        self.batch_size: int = batch_size
+        self.flush_interval: Union[int, float] = flush_interval
+        self.local = threading.local()
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS funccache ('
+                'namespace TEXT NOT NULL, key BLOB NOT NULL, '
+                'value BLOB NOT NULL, expires REAL, size INTEGER NOT NULL, '
+                'written REAL NOT NULL, PRIMARY KEY (namespace, key)'
+                ') WITHOUT ROWID'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS funccache_written '
+                'ON funccache (written)'
+            )
+            self.setup(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def locate(path: Union[str, os.PathLike], /) -> str:
+        return os.path.abspath(path)
+
+    def setup(self, conn: sqlite3.Connection, /) -> None:
+        pass
+
+    def connection(self) -> sqlite3.Connection:
+        # Each thread reads through its own connection, WAL lets them read
+        # while the store is being written.
+        conn: Optional[sqlite3.Connection] = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path)
+        return conn
+
+    def get(
+            self, namespace: str, key: Any, /
+    ) -> Optional[Tuple[Any, Optional[float]]]:
+        # Return the value and the seconds it has left to live (None if it
+        # never expires), or None if it is not stored or has expired.
+        now: float = time.time()
+        try:
+            row: Optional[Tuple[bytes, Optional[float]]] = \
+                self.connection().execute(
+                    'SELECT value, expires FROM funccache WHERE namespace = ? '
+                    'AND key = ? AND (expires IS NULL OR expires > ?)',
+                    (namespace, encode_key(key), now)
+                ).fetchone()
+            if row is None:
+                return None
+            value: Any = self.serializer.loads(row[0])
+        except Exception:
+            return None
+        return value, None if row[1] is None else row[1] - now
+
+    def lease(self, namespace: str, key: Any, /) -> bool:
+        # Whether the caller may compute the key, see `SharedStore`.
+        return True
+
+    def release(self, namespace: str, key: Any, /) -> None:
+        pass
+
+    def put(
+            self,
+            namespace: str,
+            key:       Any,
+            value:     Any,
+            expires:   Optional[float],
+            /
+    ) -> None:
+        try:
+            record: Tuple[str, bytes, bytes, Optional[float]] = (
+                namespace, encode_key(key), self.serializer.dumps(value),
+                expires
+            )
+        except Exception:
+            return
+        self.submit(('put', record))
+
+    def clear(self, namespace: str, /) -> None:
+        self.submit(('clear', namespace))
+        self.flush()
+
+    def delete(self, namespace: str, keys: Iterable[Any], /) -> None:
+        # Like `clear`, waits for the write, so that a value just invalidated
+        # is not read again from the store.
+        try:
+            encoded_keys: List[bytes] = list(map(encode_key, keys))
+        except Exception:
+            return
+        self.submit(('delete', (namespace, encoded_keys)))
+        self.flush()
+
+    def flush(self) -> None:
+        """Wait until the pending writes are done."""
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+
+    def submit(self, op: Tuple[str, Any], /) -> None:
+        self.queue.put(op)
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(
+                        target=self.run, name=f'{__package__}.disk',
+                        daemon=True
+                    )
+                    self.thread.start()
+                    atexit.register(self.flush)
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.path)
+        while True:
+            ops: list = [self.queue.get()]
+            deadline: float = time.monotonic() + self.flush_interval
+            while len(ops) < self.batch_size \
+                    and ops[-1].__class__ is not threading.Event:
+                timeout: float = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    ops.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.write(conn, ops)
+
+    def write(self, conn: sqlite3.Connection, ops: list, /) -> None:
+        now: float = time.time()
+        try:
+            with conn:
+                for op in ops:
+                    if op.__class__ is not threading.Event:
+                        self.apply(conn, op, now)
+                self.prune(conn, now)
+        except sqlite3.Error:
+            pass
+        finally:
+            for op in ops:
+                if op.__class__ is threading.Event:
+                    op.set()
+
+    @staticmethod
+    def apply(
+            conn: sqlite3.Connection, op: Tuple[str, Any], now: float, /
+    ) -> None:
+        if op[0] == 'put':
+            namespace, key, value, expires = op[1]
+            conn.execute(
+                'INSERT OR REPLACE INTO funccache VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, key, value, expires, len(key) + len(value), now)
+            )
+        elif op[0] == 'delete':
+            namespace, keys = op[1]
+            conn.executemany(
+                'DELETE FROM funccache WHERE namespace = ? AND key = ?',
+                [(namespace, key) for key in keys]
+            )
+        else:
+            conn.execute(
+                'DELETE FROM funccache WHERE namespace = ?', (op[1],)
+            )
+
+    def prune(self, conn: sqlite3.Connection, now: float, /) -> None:
+        conn.execute('DELETE FROM funccache WHERE expires <= ?', (now,))
+        if self.max_bytes is not None:
+            # Keep the most recently written values within the budget.
+            conn.execute(
+                'DELETE FROM funccache WHERE (namespace, key) IN ('
+                'SELECT namespace, key FROM (SELECT namespace, key, '
+                'SUM(size) OVER (ORDER BY written DESC, namespace, key) '
+                'AS kept FROM funccache) WHERE kept > ?)',
+                (self.max_bytes,)
+            )
+
+
+class SharedStore(DiskStore):
+    """A `DiskStore` shared by the processes of a host, in the shared memory
+    directory (`/dev/shm` where available) under the given name. Values are
+    written at once, and a missing key is computed by one process only: it
+    holds a lease on the key, which the others wait for, then read the value
+    it wrote. A lease not released within `lease_timeout` seconds, such as of
+    a killed process, is taken over. Hits in the cache pool of each process
+    do not touch the store."""
+
+    def __init__(
+            self,
+            name:          Union[str, os.PathLike],
+            /, *,
+            serializer:    Any               = pickle,
+            max_bytes:     Optional[int]     = None,
+            lease_timeout: Union[int, float] = 60,
+            poll_interval: Union[int, float] = .01
+    ):
+        DiskStore.__init__(
+            self, name, serializer=serializer, max_bytes=max_bytes
+        )
+        self.lease_timeout: Union[int, float] = lease_timeout
+        self.poll_interval: Union[int, float] = poll_interval
+        self.counter = itertools.count(1)
+
+    @staticmethod
+    def locate(name: Union[str, os.PathLike], /) -> str:
+        name = os.fspath(name)
+        if os.sep in name:
+            return os.path.abspath(name)
+        return os.path.join(shared_memory_dir, f'{__package__}-{name}.db')
+
+    def setup(self, conn: sqlite3.Connection, /) -> None:
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS funccache_lease ('
+            'namespace TEXT NOT NULL, key BLOB NOT NULL, '
+            'expires REAL NOT NULL, PRIMARY KEY (namespace, key)'
+            ') WITHOUT ROWID'
+        )
+
+    def lease(self, namespace: str, key: Any, /) -> bool:
+        # False if another process holds the lease, or has written the value
+        # since the caller looked it up. If the store fails, the caller just
+        # computes.
+        now: float = time.time()
+        try:
+            encoded_key: bytes = encode_key(key)
+            conn: sqlite3.Connection = self.connection()
+            with conn:
+                conn.execute(
+                    'DELETE FROM funccache_lease WHERE namespace = ? '
+                    'AND key = ? AND expires <= ?',
+                    (namespace, encoded_key, now)
+                )
+                if not conn.execute(
+                        'INSERT OR IGNORE INTO funccache_lease '
+                        'VALUES (?, ?, ?)',
+                        (namespace, encoded_key, now + self.lease_timeout)
+                ).rowcount:
+                    return False
+                if conn.execute(
+                        'SELECT 1 FROM funccache WHERE namespace = ? AND '
+                        'key = ? AND (expires IS NULL OR expires > ?)',
+                        (namespace, encoded_key, now)
+                ).fetchone():
+                    conn.execute(
+                        'DELETE FROM funccache_lease WHERE namespace = ? '
+                        'AND key = ?', (namespace, encoded_key)
+                    )
+                    return False
+        except Exception:
+            return True
+        return True
+
+    def release(self, namespace: str, key: Any, /) -> None:
+        try:
+            conn: sqlite3.Connection = self.connection()
+            with conn:
+                conn.execute(
+                    'DELETE FROM funccache_lease WHERE namespace = ? '
+                    'AND key = ?', (namespace, encode_key(key))
+                )
+        except Exception:
+            pass
+
+    def put(
+            self,
+            namespace: str,
+            key:       Any,
+            value:     Any,
+            expires:   Optional[float],
+            /
+    ) -> None:
+        # Written at once, in the same transaction that releases the lease.
+        now: float = time.time()
+        try:
+            encoded_key: bytes = encode_key(key)
+            record: Tuple[str, bytes, bytes, Optional[float]] = (
+                namespace, encoded_key, self.serializer.dumps(value), expires
+            )
+            conn: sqlite3.Connection = self.connection()
+            with conn:
+                self.apply(conn, ('put', record), now)
+                conn.execute(
+                    'DELETE FROM funccache_lease WHERE namespace = ? '
+                    'AND key = ?', (namespace, encoded_key)
+                )
+                if next(self.counter) % self.batch_size == 0:
+                    self.prune(conn, now)
+        except Exception:
+            self.release(namespace, key)
+
+    def submit(self, op: Tuple[str, Any], /) -> None:
+        # Clearing and deleting are done at once as well, so that no process
+        # reads what another has just invalidated.
+        try:
+            conn: sqlite3.Connection = self.connection()
+            with conn:
+                self.apply(conn, op, time.time())
+        except sqlite3.Error:
+            pass
+
+
+shared_memory_dir: str = \
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+stores: Dict[Tuple[type, str], DiskStore] = {}
+stores_lock = threading.Lock()
+
+
+def open_store(
+        store:       Union[str, os.PathLike, DiskStore],
+        store_class: Type[DiskStore] = DiskStore,
+        /, *,
+        name:        str = 'parameter "disk"'
+) -> DiskStore:
+    # Caches given the same path or name share one store.
+    if isinstance(store, store_class):
+        return store
+
+    if not isinstance(store, (str, os.PathLike)):
+        raise TypeError(
+            f'{name} is expected to be a path or a "{store_class.__name__}", '
+            f'not {store!r}.'
+        )
+
+    location: Tuple[type, str] = store_class, store_class.locate(store)
+
+    with stores_lock:
+        try:
+            return stores[location]
+        except KeyError:
+            instance = stores[location] = store_class(store)
+            return instance
+
+
+def select_store(
+        disk:   Optional[Union[str, os.PathLike, DiskStore]],
+        shared: Optional[Union[str, os.PathLike, SharedStore]],
+        /
+) -> Optional[DiskStore]:
+    if shared is None:
+        return None if disk is None else open_store(disk)
+    if disk is not None:
+        raise ValueError(
+            'parameters "disk" and "shared" cannot be specified together.'
+        )
+    return open_store(shared, SharedStore, name='parameter "shared"')
+
+
+def encode_key(key: Any, /) -> bytes:
+    # The order of a frozenset depends on the hash seed of the process, so its
+    # items are sorted, to get the same bytes for the same key after restarts.
+    return pickle.dumps(canonical_key(key), protocol=4)
+
+
+def canonical_key(key: Any, /) -> Any:
+    if key.__class__ is tuple:
+        return tuple(map(canonical_key, key))
+    if key.__class__ is frozenset:
+        return frozenset, tuple(sorted(map(encode_key, key)))
+    return key
+
+
+def single_flight(
+        entry:    Entry,
+        create:   Callable[[], Awaitable],
+        callback: Callable[[asyncio.Task], None],
+        /
+) -> asyncio.Task:
+    # The coroutine runs as a task stored in `entry.flight` while in flight,
+    # each caller of the same loop awaits it through `asyncio.shield`, so one
+    # cancelled caller does not cancel the others. An exception reaches all
+    # callers, `callback` decides what is cached.
+    loop = asyncio.get_running_loop()
+    task: Optional[asyncio.Task] = entry.flight
+
+    if task is None or task.get_loop() is not loop:
+        task = entry.flight = loop.create_task(create())
+
+        def done(task: asyncio.Task, /) -> None:
+            callback(task)
+            if entry.flight is task:
+                entry.flight = None
+
+        task.add_done_callback(done)
+
+    return task
+
+
+class Stream:
+    """The items of one generator, pulled once from `source` into `buffer`.
+    Each reader replays the buffer from the start, whichever reader is ahead
+    pulls the next item, so the stream is shared while still being produced.
+    Past `max_items` items the stream overflows: `release` takes it out of
+    the cache pool at once, and the buffer is dropped once a single reader
+    pulls from the source or no reader is left."""
+    __slots__ = (
+        'source', 'buffer', 'lock', 'pull', 'done', 'error', 'readers',
+        'max_items', 'overflow', 'release'
+    )
+
+    def __init__(self, source: Iterator, max_items: Optional[int], /):
+        self.source = source
+        self.buffer: Optional[list] = []
+        self.lock = threading.Lock()
+        self.pull = threading.Lock()
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+        self.max_items = max_items
+        self.overflow = False
+        self.release: Optional[Callable[[], None]] = None
+
+    def replay(self) -> Optional[Union[Iterator, AsyncIterator]]:
+        # None if the stream can not be replayed, the caller then runs the
+        # generator function again, uncached.
+        with self.lock:
+            if self.overflow or self.error is not None:
+                return None
+            self.readers += 1
+        return self.read()
+
+    def read(self) -> Iterator:
+        index = 0
+        try:
+            while True:
+                buffer: Optional[list] = self.buffer
+                if buffer is not None and index < len(buffer):
+                    yield buffer[index]
+                    index += 1
+                    continue
+                with self.pull:
+                    buffer = self.buffer
+                    if buffer is not None and index < len(buffer):
+                        continue
+                    if self.error is not None:
+                        raise self.error
+                    if self.done:
+                        return
+                    try:
+                        item = next(self.source)
+                    except StopIteration:
+                        self.done = True
+                        return
+                    except BaseException as e:
+                        self.error = e
+                        raise
+                    self.keep(item)
+                yield item
+                index += 1
+        finally:
+            self.leave()
+
+    def leave(self) -> None:
+        # A reader is done. The last one drops the buffer of an overflowed
+        # stream, a reader still left may be behind and need it.
+        with self.lock:
+            self.readers -= 1
+            if self.overflow and self.readers == 0:
+                self.buffer = None
+
+    def keep(self, item: Any, /) -> None:
+        # Called under `self.pull`.
+        buffer: Optional[list] = self.buffer
+        if buffer is None:
+            return
+        buffer.append(item)
+        if self.max_items is not None and len(buffer) > self.max_items:
+            with self.lock:
+                overflowed: bool = self.overflow
+                self.overflow = True
+                if self.readers == 1:
+                    self.buffer = None
+            if not overflowed and self.release is not None:
+                self.release()
+
+
+class AsyncStream(Stream):
+    __slots__ = ()
+
+    def __init__(self, source: AsyncIterator, max_items: Optional[int], /):
+        super().__init__(source, max_items)
+        self.pull = asyncio.Lock()
+
+    async def read(self) -> AsyncIterator:
+        index = 0
+        try:
+            while True:
+                buffer: Optional[list] = self.buffer
+                if buffer is not None and index < len(buffer):
+                    yield buffer[index]
+                    index += 1
+                    continue
+                async with self.pull:
+                    buffer = self.buffer
+                    if buffer is not None and index < len(buffer):
+                        continue
+                    if self.error is not None:
+                        raise self.error
+                    if self.done:
+                        return
+                    try:
+                        item = await self.source.__anext__()
+                    except StopAsyncIteration:
+                        self.done = True
+                        return
+                    except BaseException as e:
+                        self.error = e
+                        raise
+                    self.keep(item)
+                yield item
+                index += 1
+        finally:
+            self.leave()
+
+
+class Packed:
+    """A value stored compressed, `kind` is `bytes` or `str`, the type it is
+    restored to on each hit."""
+    __slots__ = ('data', 'kind')
+
+    def __init__(self, data: bytes, kind: type, /):
+        self.data = data
+        self.kind = kind
+
+
+def unpacking(core: Callable, codec: Codec, stats: 'Stats', /) -> Callable:
+    # Wraps the core of a caller whose cache pool compresses values, to
+    # decompress the `Packed` ones, timing each decompression in `stats`.
+    def unpack(packed: Packed, /) -> Union[bytes, str]:
+        start: float = time.perf_counter()
+        data: bytes = codec.decompress(packed.data)
+        stats.decoded(time.perf_counter() - start)
+        return data if packed.kind is bytes else data.decode()
+
+    if asyncio.iscoroutinefunction(core):
+        async def inner(*a, **kw) -> Any:
+            value: Any = await core(*a, **kw)
+            return unpack(value) if value.__class__ is Packed else value
+    else:
+        def inner(*a, **kw) -> Any:
+            value: Any = core(*a, **kw)
+            return unpack(value) if value.__class__ is Packed else value
+
+    return inner
+
+
+def validating(
+        core:     Callable,
+        caller:   Union[FunctionCaller, FunctionCallerTTL, FunctionCallerCount],
+        depends:  Callable[..., Iterable],
+        interval: Union[int, float],
+        /, *,
+        skip:     int = 0
+) -> Callable:
+    # Wraps the core of a caller whose values depend on files or versions,
+    # its arguments after the first `skip` are those of the cached function.
+    # `pool.depends` maps each key to a record [entry, dependencies,
+    # fingerprints, checked], the fingerprints taken before computing the
+    # entry. At most once per `interval` they are taken again, the entry is
+    # discarded if they changed, and computed again by `core`.
+    pool: CachePool = caller.__cache_pool__
+    records: Dict[Any, list] = pool.depends
+
+    def check(a: tuple, kw: dict, /) -> Tuple[Any, Optional[list]]:
+        key: Any = caller.cache_key(*a, **kw)
+        record: Optional[list] = records.get(key)
+        now: float = time.monotonic()
+        if record is not None and record[0] is pool.get(key):
+            if now - record[3] < interval:
+                return key, None
+            record[3] = now
+            if fingerprints(record[1], interval) == record[2]:
+                return key, None
+            with pool.lock:
+                pool.discard(key, record[0])
+        dependencies: tuple = tuple(depends(*a, **kw))
+        return key, [
+            None, dependencies, fingerprints(dependencies, interval), now
+        ]
+
+    def keep(key: Any, record: list, /) -> None:
+        record[0] = pool.get(key)
+        if record[0] is not None:
+            records[key] = record
+
+    if asyncio.iscoroutinefunction(core):
+        async def inner(*a, **kw) -> Any:
+            key, record = check(a[skip:], kw)
+            value: Any = await core(*a, **kw)
+            if record is not None:
+                keep(key, record)
+            return value
+    else:
+        def inner(*a, **kw) -> Any:
+            key, record = check(a[skip:], kw)
+            value: Any = core(*a, **kw)
+            if record is not None:
+                keep(key, record)
+            return value
+
+    return inner
+
+
+def fingerprints(
+        dependencies: Iterable[Any], interval: Union[int, float], /
+) -> tuple:
+    return tuple(fingerprint(d, interval) for d in dependencies)
+
+
+def fingerprint(dependency: Any, interval: Union[int, float], /) -> Hashable:
+    # The version returned by a callable, or the modification time, size and
+    # inode of a file, None if missing. Taken at most once per `interval` for
+    # all keys of all caches depending on it, so a file is stat once.
+    if not callable(dependency):
+        dependency = os.fspath(dependency)
+    now: float = time.monotonic()
+    taken: Optional[Tuple[Hashable, float]] = taken_fingerprints.get(dependency)
+    if taken is not None and now - taken[1] < interval:
+        return taken[0]
+    if callable(dependency):
+        value: Hashable = dependency()
+    else:
+        try:
+            stat: os.stat_result = os.stat(dependency)
+        except OSError:
+            value = None
+        else:
+            value = stat.st_mtime_ns, stat.st_size, stat.st_ino
+    taken_fingerprints.keep(dependency, value, now, interval)
+    return value
+
+
+class Fingerprints(dict):
+    """The fingerprint last taken of each dependency, with the time it was
+    taken. Once it holds more than `limit` dependencies, those not taken
+    within an interval are dropped, at most once per interval, so it holds
+    only the dependencies still being checked."""
+    limit = 1024
+
+    def __init__(self):
+        dict.__init__(self)
+        self.pruned: float = 0
+
+    def keep(
+            self, dependency: Any, value: Hashable, now: float,
+            interval: Union[int, float], /
+    ) -> None:
+        self[dependency] = value, now
+        if len(self) > self.limit and now - self.pruned >= interval:
+            self.pruned = now
+            # A copy, as other threads keep fingerprints meanwhile.
+            for d, (_, taken) in list(self.items()):
+                if now - taken >= interval:
+                    self.pop(d, None)
+
+
+taken_fingerprints = Fingerprints()
+
+
+def is_generator_function(func: Callable, /) -> bool:
+    func = getattr(func, '__wrapped__', func)
+    return inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)
+
+
+def streaming(func: Wrapped, max_items: Optional[int], /) -> Callable:
+    # The cached value of a generator function is the `Stream` of its items,
+    # not the generator object, which could be consumed only once.
+    if inspect.isasyncgenfunction(getattr(func, '__wrapped__', func)):
+        stream = AsyncStream
+    else:
+        stream = Stream
+
+    @functools.wraps(func)
+    def create(*a, **kw) -> Stream:
+        return stream(func(*a, **kw), max_items)
+
+    return create
+
+
+def replay(
+        caller: Union[FunctionCaller, FunctionCallerTTL, FunctionCallerCount],
+        stream: Stream,
+        func:   Wrapped,
+        a:      tuple,
+        kw:     dict,
+        /
+) -> Union[Iterator, AsyncIterator]:
+    if stream.release is None:
+        # Set by the first reader, the stream leaves the cache on overflow.
+        stream.release = functools.partial(
+            caller.__cache_pool__.drop, caller.cache_key(*a, **kw), stream
+        )
+    reader: Optional[Union[Iterator, AsyncIterator]] = stream.replay()
+    if reader is None:
+        # Overflowed or failed, the stream leaves the cache.
+        caller.__cache_pool__.drop(caller.cache_key(*a, **kw), stream)
+        return func(*a, **kw)
+    return reader
+
+
+missing = object()
+nokw = frozenset()
+inf = float('inf')
+
+
+class Unallocated:
+    """Hides the cache pool shared by a base class from the instances of a
+    subclass that does not share one, until they are allocated their own."""
+    __slots__ = ()
+
+    def __get__(self, ins: Any, owner: Optional[type] = None) -> NoReturn:
+        raise AttributeError('__cache_pool__')
+
+
+unallocated = Unallocated()
+allocation_lock = threading.Lock()
+exhausted: Iterator[int] = itertools.repeat(sys.maxsize)
+
+# Lock striping: a miss holds the lock of the stripe of its key while it looks
+# the key up and claims its computation, the stripes are shared by all pools.
+key_locks: Tuple[threading.Lock, ...] = tuple(
+    threading.Lock() for _ in range(64)
+)
+
+
+def key_lock(key: Any, /) -> threading.Lock:
+    return key_locks[hash(key) % len(key_locks)]
+
+
+def freeze_key(*a, **kw) -> Hashable:
+    return tuple(map(freeze, a)), frozenset(
+        (k, freeze(v)) for k, v in kw.items()
+    ) if kw else nokw
+
+
+def digest_key(*a, **kw) -> Hashable:
+    return tuple(map(digest_unhashable, a)), frozenset(
+        (k, digest_unhashable(v)) for k, v in kw.items()
+    ) if kw else nokw
+
+
+def freeze(value: Any, /) -> Hashable:
+    cls: type = value.__class__
+
+    if cls in hashable_types:
+        return value
+
+    if cls is tuple:
+        return tuple(map(freeze, value))
+
+    if cls is list or cls is deque:
+        return cls, tuple(map(freeze, value))
+
+    if isinstance(value, dict):
+        return cls, frozenset((k, freeze(v)) for k, v in value.items())
+
+    if isinstance(value, (set, frozenset)):
+        return cls, frozenset(value)
+
+    if isinstance(value, tuple):
+        return cls, tuple(map(freeze, value))
+
+    return digest_unhashable(value)
+
+
+def digest_unhashable(value: Any, /) -> Hashable:
+    try:
+        hash(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        return value
+
+    try:
+        view = memoryview(value)
+    except TypeError:
+        raise TypeError(
+            f'unhashable type: "{value.__class__.__name__}", and it does not '
+            'support the buffer protocol.'
+        ) from None
+
+    # The buffer is hashed in place, only a non-contiguous one is copied.
+    with view:
+        return value.__class__, view.format, view.shape, hashlib.blake2b(
+            view if view.c_contiguous else view.tobytes(), digest_size=16
+        ).digest()
+
+
+hashable_types: Set[type] = {
+    int, float, complex, bool, str, bytes, type(None), type(...), range
+}
+
+
+def sizeof(value: Any, /) -> int:
+    # Deep `sys.getsizeof`, an object referenced twice is counted once. A
+    # buffer or an array counts at least its `nbytes`, which `sys.getsizeof`
+    # misses when it is a view. Classes, functions and modules are shared,
+    # not owned by the value, so they are not counted.
+    size: int = 0
+    seen: Set[int] = set()
+    stack: List[Any] = [value]
+
+    while stack:
+        obj: Any = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        cls: type = obj.__class__
+        size += sys.getsizeof(obj, 0)
+
+        if cls in hashable_types:
+            continue
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif isinstance(obj, (type, FunctionType, MethodType, ModuleType)):
+            continue
+        elif getattr(obj, 'nbytes', None).__class__ is int:
+            size += max(obj.nbytes - sys.getsizeof(obj, 0), 0)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for slots in (c.__dict__.get('__slots__', ()) for c in cls.__mro__):
+                for name in (slots,) if slots.__class__ is str else slots:
+                    if name not in ('__dict__', '__weakref__'):
+                        stack.append(getattr(obj, name, None))
+
+    return size
+
+
+def signature_key(func: Callable, /, *, skip_first: bool = False) -> Callable:
+    # Generate a function with the same parameters and defaults as `func`, so
+    # that the interpreter binds the arguments, and every equivalent call gets
+    # the same key, a tuple of the values of all parameters in order.
+    parameters: List[inspect.Parameter] = \
+        list(inspect.signature(func).parameters.values())
+
+    if skip_first:
+        parameters = parameters[1:]
+
+    namespace: Dict[str, Any] = {'__nokw__': nokw, '__freeze__': frozenset}
+    args: List[str] = []
+    values: List[str] = []
+    kwonly_marked: bool = False
+
+    for index, p in enumerate(parameters):
+        if p.kind is p.KEYWORD_ONLY and not kwonly_marked:
+            args.append('*')
+            kwonly_marked = True
+        if p.kind is p.VAR_POSITIONAL:
+            args.append(f'*{p.name}')
+            kwonly_marked = True
+        elif p.kind is p.VAR_KEYWORD:
+            args.append(f'**{p.name}')
+            values.append(
+                f'__freeze__({p.name}.items()) if {p.name} else __nokw__'
+            )
+            continue
+        elif p.default is p.empty:
+            args.append(p.name)
+        else:
+            namespace[f'__default{index}__'] = p.default
+            args.append(f'{p.name}=__default{index}__')
+        values.append(p.name)
+        if p.kind is p.POSITIONAL_ONLY and (
+                index + 1 == len(parameters)
+                or parameters[index + 1].kind is not p.POSITIONAL_ONLY
+        ):
+            args.append('/')
+
+    name: str = getattr(func, '__name__', 'key')
+    if not name.isidentifier():
+        name = 'key'
+
+    exec(
+        f'def {name}({", ".join(args)}):\n'
+        f'    return ({"".join(f"{v}, " for v in values)})',
+        namespace
+    )
+
+    return namespace[name]
+
+
+def check_maxsize_and_eviction(
+        maxsize:  Optional[int],
+        eviction: Eviction,
+        /, *,
+        name:     str = 'parameter "maxsize"',
+        ename:    str = 'parameter "eviction"'
+) -> None:
+    if not (maxsize is None or maxsize.__class__ is int):
+        raise TypeError(
+            f'{name} is expected to be of type int, not {maxsize!r}.'
+        )
+    if maxsize is not None and maxsize < 0:
+        raise ValueError(
+            f'{name} is expected to be a non-negative int, not {maxsize!r}.'
+        )
+    if eviction.__class__ is str:
+        if eviction.upper() not in eviction_policies:
+            raise ValueError(
+                f'{ename} is expected to be one of '
+                f'{", ".join(eviction_policies)}, not {eviction!r}.'
+            )
+    elif not (
+            isinstance(eviction, type) and issubclass(eviction, EvictionPolicy)
+    ):
+        raise TypeError(
+            f'{ename} is expected to be a str or a subclass of '
+            f'"{EvictionPolicy.__name__}", not {eviction!r}.'
+        )
+
+
+def check_max_bytes(
+        max_bytes: Optional[int],
+        sizer:     Optional[Callable[[Any], int]],
+        /, *,
+        name:      str = 'parameter "max_bytes"',
+        sname:     str = 'parameter "sizer"'
+) -> None:
+    if not (
+            max_bytes is None or max_bytes.__class__ is int and max_bytes >= 0
+    ):
+        raise ValueError(
+            f'{name} is expected to be a non-negative int, not {max_bytes!r}.'
+        )
+    if not (sizer is None or callable(sizer)):
+        raise TypeError(f'{sname} is expected to be callable, not {sizer!r}.')
+
+
+def check_max_items(
+        max_items: Optional[int], /, *, name: str = 'parameter "max_items"'
+) -> None:
+    if not (
+            max_items is None or max_items.__class__ is int and max_items >= 0
+    ):
+        raise ValueError(
+            f'{name} is expected to be a non-negative int, not {max_items!r}.'
+        )
+
+
+def check_stream_store(func: Wrapped, store: Optional[DiskStore], /) -> None:
+    if store is not None:
+        raise TypeError(
+            f'generator function "{func.__qualname__}" can not be cached '
+            'on disk or shared, its items are produced in this process.'
+        )
+
+
+def check_cache_exceptions(
+        types: Optional[Exceptions],
+        ttl:   TTL,
+        /, *,
+        name:  str = 'parameter "cache_exceptions"',
+        tname: str = 'parameter "exception_ttl"'
+) -> Optional[Tuple[Tuple[Type[BaseException], ...], Union[int, float]]]:
+    # Return the exception types as a tuple and the time to live in seconds,
+    # or None if exceptions are not cached.
+    if types is None:
+        return None
+    if isinstance(types, type):
+        types = types,
+    if not (types.__class__ is tuple and types and all(
+            isinstance(t, type) and issubclass(t, BaseException)
+            for t in types
+    )):
+        raise TypeError(
+            f'{name} is expected to be an exception class or a tuple of '
+            f'exception classes, not {types!r}.'
+        )
+    if isinstance(ttl, str):
+        ttl = time2second(ttl)
+    elif not (ttl.__class__ in (int, float) and ttl >= 0):
+        raise ValueError(
+            f'{tname} is expected to be a non-negative number, not {ttl!r}.'
+        )
+    return types, ttl
+
+
+def check_compress(
+        codec: Optional[Codec],
+        above: int,
+        /, *,
+        name:  str = 'parameter "compress"',
+        aname: str = 'parameter "compress_above"'
+) -> Optional[Tuple[Codec, int]]:
+    # Return the codec, a module if named, and the threshold, or None if
+    # values are not compressed.
+    if codec is None:
+        return None
+    if codec.__class__ is str:
+        if codec not in ('zlib', 'lzma', 'bz2'):
+            raise ValueError(
+                f'{name} is expected to be one of zlib, lzma, bz2, or a codec, '
+                f'not {codec!r}.'
+            )
+        codec = __import__(codec)
+    elif not (
+            callable(getattr(codec, 'compress', None))
+            and callable(getattr(codec, 'decompress', None))
+    ):
+        raise TypeError(
+            f'{name} is expected to be a str or an object with the functions '
+            f'"compress" and "decompress", not {codec!r}.'
+        )
+    if not (above.__class__ is int and above >= 0):
+        raise ValueError(
+            f'{aname} is expected to be a non-negative int, not {above!r}.'
+        )
+    return codec, above
+
+
+def check_depends(
+        depends_on: Optional[Depends],
+        interval:   Union[int, float],
+        /, *,
+        name:       str = 'parameter "depends_on"',
+        iname:      str = 'parameter "check_interval"'
+) -> Optional[Tuple[Callable[..., Iterable], Union[int, float]]]:
+    # Return a function that returns the dependencies of a call, and the
+    # check interval, or None if there are no dependencies.
+    if depends_on is None:
+        return None
+    if not (interval.__class__ in (int, float) and interval >= 0):
+        raise ValueError(
+            f'{iname} is expected to be a non-negative number, not '
+            f'{interval!r}.'
+        )
+    if callable(depends_on):
+        return depends_on, interval
+    if isinstance(depends_on, (str, bytes, os.PathLike)):
+        depends_on = depends_on,
+    try:
+        dependencies: tuple = tuple(
+            d if callable(d) else os.fspath(d) for d in depends_on
+        )
+    except TypeError:
+        raise TypeError(
+            f'{name} is expected to be a function, a path, or an iterable of '
+            f'paths and functions, not {depends_on!r}.'
+        ) from None
+    return (lambda *a, **kw: dependencies), interval
+
+
+def check_jitter_and_early_expiration(
+        jitter: Union[int, float],
+        early:  Union[int, float],
+        /, *,
+        name:   str = 'parameter "jitter"',
+        ename:  str = 'parameter "early_expiration"'
+) -> None:
+    if not (jitter.__class__ in (int, float) and 0 <= jitter < 1):
+        raise ValueError(
+            f'{name} is expected to be a number in [0, 1), not {jitter!r}.'
+        )
+    if not (early.__class__ in (int, float) and 0 <= early < inf):
+        raise ValueError(
+            f'{ename} is expected to be a non-negative number, not {early!r}.'
+        )
+
+
+def clear_cache_pool(func: Union[
+        FunctionCaller, FunctionCallerTTL, Type[object], FuncCache
+], /) -> None:
+    if isinstance(func.__class__, FuncCache):
+        pool: Optional[CachePool] = find_cache_pool(func)
+        if pool is not None:  # None if it never made a cached call.
+            pool.clear()
+        return
+    try:
+        func.__cache_pool__.clear()
+    except AttributeError:
+        raise TypeError(
+            f'"{func.__module__}.{func.__qualname__}" is not cached.'
+        ) from None
+
+
+def tags_function(
+        tags: Optional[Union[Callable[..., Iterable], Iterable]],
+        /, *,
+        name: str = 'parameter "tags"'
+) -> Optional[Callable[..., Iterable]]:
+    # The tags are either returned by a function called with the same
+    # arguments as the cached function, or the same for each call, a single
+    # string being a single tag.
+    if tags is None or callable(tags):
+        return tags
+
+    if isinstance(tags, str):
+        tags = tags,
+
+    try:
+        static_tags: FrozenSet[Hashable] = frozenset(tags)
+    except TypeError:
+        raise TypeError(
+            f'{name} is expected to be a function or an iterable of hashable '
+            f'tags, not {tags!r}.'
+        ) from None
+
+    return lambda *a, **kw: static_tags
+
+
+class MethodPolicy(NamedTuple):
+    ttl:     Optional[Union[int, float]] = None
+    count:   Optional[int]               = None
+    maxsize: Optional[int]               = None
+    cache:   bool                        = True
+
+
+default_policy = MethodPolicy()
+
+
+def policy(
+        *,
+        ttl:     Optional[TTL] = None,
+        count:   Optional[int] = None,
+        maxsize: Optional[int] = None
+) -> Callable[[Wrapped], Wrapped]:
+    # Only marks the method, `FuncCache` reads the mark once when the class is
+    # created, and `MethodCaller` is then specialized for it.
+    if isinstance(ttl, str):
+        ttl = time2second(ttl)
+    elif not (ttl is None or isinstance(ttl, (int, float))):
+        raise TypeError(
+            'parameter "ttl" is expected to be of type int or float, '
+            f'not {ttl!r}.'
+        )
+
+    if not (count is None or count.__class__ is int):
+        raise TypeError(
+            f'parameter "count" type must be an int, not "{count!r}".'
+        )
+
+    if ttl is not None and count is not None:
+        raise ValueError(
+            'parameters "ttl" and "count" cannot be used together.'
+        )
+
+    check_maxsize_and_eviction(maxsize, 'LRU')
+
+    return functools.partial(mark_method, MethodPolicy(ttl, count, maxsize))
+
+
+def not_cache(method: Wrapped, /) -> Wrapped:
+    return mark_method(MethodPolicy(cache=False), method)
+
+
+def mark_method(policy: MethodPolicy, method: Wrapped, /) -> Wrapped:
+    # A `property` has no attributes of its own, the mark goes to the
+    # underlying function of any kind of method.
+    func: Any = method_function(method)
+    if func.__class__ is not FunctionType:
+        raise TypeError(
+            f'a function, staticmethod, classmethod or property is expected, '
+            f'not {method!r}.'
+        )
+    func.__cache_policy__ = policy
+    return method
+
+
+def method_function(
+        method: Union[FunctionType, staticmethod, classmethod, property], /
+) -> FunctionType:
+    if method.__class__ is property:
+        return method.fget
+    if method.__class__ in (staticmethod, classmethod):
+        return method.__func__
+    return method
+
+
+def find_function_caller(func: Any, /) -> Union[
+        FunctionCaller, FunctionCallerTTL, FunctionCallerCount,
+        FunctionCallerBatch
+]:
+    if func.__class__ is FunctionCaller:
+        return func
+    try:
+        return func.__function_caller__
+    except AttributeError:
+        raise TypeError(
+            f'"{func.__module__}.{func.__qualname__}" is not cached.'
+        ) from None
+
+
+def invalidate(func: Any, /, *a, **kw) -> bool:
+    pool, key = find_cache_key(func, a, kw)
+    if pool is None:
+        return False
+    return pool.invalidate((key,)) == 1
+
+
+def find_cache_key(
+        func: Any, a: tuple, kw: dict, /
+) -> Tuple[Optional[CachePool], Any]:
+    # The cache pool and the key of a call, the pool is None for an instance
+    # that made no cached call yet.
+    caller, ins = find_method_caller(func)
+
+    if caller is None:
+        function_caller = find_function_caller(func)
+        return function_caller.__cache_pool__, function_caller.cache_key(
+            *a, **kw
+        )
+
+    if ins is None:
+        # Not bound, the instance comes first, as when calling it.
+        if not a:
+            raise TypeError(
+                f'"{caller.__objclass__.__module__}.{caller.__qualname__}"'
+                ' is not bound, its instance is expected as the first '
+                'argument.'
+            )
+        ins, a = a[0], a[1:]
+
+    return find_cache_pool(ins), caller.cache_key(a, kw)
+
+
+def find_cache_pool(ins_or_cls: Any, /) -> Optional[CachePool]:
+    # The cache pool of an instance or the one shared by a class, read without
+    # calling a `__getattr__` the class defines, None if it has none.
+    getattribute: Callable[[Any, str], Any] = type.__getattribute__ \
+        if isinstance(ins_or_cls, type) else object.__getattribute__
+    try:
+        pool: Any = getattribute(ins_or_cls, '__cache_pool__')
+    except AttributeError:
+        return None
+    return pool if isinstance(pool, CachePool) else None
+
+
+def invalidate_where(
+        func: Any, predicate: Callable[[Any], bool], /
+) -> int:
+    if isinstance(func, FuncCache) or isinstance(func.__class__, FuncCache):
+        pool: Optional[CachePool] = find_cache_pool(func)
+        if pool is None:
+            if isinstance(func, FuncCache):
+                raise TypeError(
+                    f'"{func.__module__}.{func.__qualname__}" has no shared '
+                    'cache pool.'
+                )
+            return 0
+        match: Callable[[Any], bool] = predicate
+    else:
+        caller, ins = find_method_caller(func)
+        if caller is None:
+            pool = find_function_caller(func).__cache_pool__
+            match = predicate
+        else:
+            pool = find_cache_pool(caller.__objclass__ if ins is None else ins)
+            if pool is None:
+                if ins is not None:
+                    return 0
+                raise TypeError(
+                    f'"{caller.__objclass__.__module__}.{caller.__qualname__}"'
+                    ' is not bound, and its class has no shared cache pool.'
+                )
+            qualname: str = caller.__qualname__
+
+            def match(key: Any, /) -> bool:
+                if key.__class__ is tuple:
+                    return key[0] == qualname and predicate(key[1])
+                return key == qualname and predicate(())
+
+    # The predicate runs without holding the lock, it may use the cache.
+    with pool.lock:
+        keys: List[Any] = list(pool)
+
+    return pool.invalidate([key for key in keys if match(key)])
+
+
+def invalidate_tag(*tags: Hashable) -> int:
+    removed: int = 0
+
+    for pool in list(tagged_pools.values()):
+        with pool.lock:
+            keys: Set[Any] = set()
+            for tag in tags:
+                keys.update(pool.tags.get(tag, ()))
+        if keys:
+            removed += pool.invalidate(keys)
+
+    return removed
+
+
+def cache_info(func: Union[
+        FunctionCaller, FunctionCallerTTL, FunctionCallerCount, MethodCaller,
+        FuncCache, Any
+], /) -> Union[CacheInfo, Dict[str, CacheInfo]]:
+    if isinstance(func, FuncCache) or isinstance(func.__class__, FuncCache):
+        cls: FuncCache = func if isinstance(func, FuncCache) else func.__class__
+        return {
+            name: method_cache_info(caller, func)
+            for name, caller in cls.__method_callers__.items()
+        }
+
+    caller, ins = find_method_caller(func)
+
+    if caller is not None:
+        return method_cache_info(caller, ins or caller.__objclass__)
+
+    try:
+        pool: CachePool = func.__cache_pool__
+        return func.__cache_stats__.info(
+            len(pool), None if pool.max_bytes is None else pool.nbytes
+        )
+    except AttributeError:
+        raise TypeError(
+            f'"{func.__module__}.{func.__qualname__}" is not cached.'
+        ) from None
+
+
+def method_cache_info(
+        caller: MethodCaller, ins_or_cls: Any, /
+) -> CacheInfo:
+    # The size is only known where the cache pool is, a class without shared
+    # cache pool has none, its instances have one each, once they made a
+    # cached call.
+    pool: Optional[CachePool] = find_cache_pool(ins_or_cls)
+
+    if pool is None:
+        return caller.__cache_stats__.info(
+            None if isinstance(ins_or_cls, FuncCache) else 0
+        )
+
+    qualname: str = caller.__qualname__
+
+    with pool.lock:
+        keys: List[Any] = [
+            key for key in list(pool)
+            if (key[0] if key.__class__ is tuple else key) == qualname
+        ]
+        nbytes: Optional[int] = None if pool.sizes is None else sum(
+            pool.sizes.get(key, 0) for key in keys
+        )
+
+    return caller.__cache_stats__.info(len(keys), nbytes)
+
+
+def find_method_caller(
+        func: Any, /
+) -> Tuple[Optional[MethodCaller], Optional[Any]]:
+    if func.__class__ is MethodType:
+        if func.__func__.__class__ is MethodCaller:
+            return func.__func__, func.__self__
+        caller = getattr(func.__func__, '__method_caller__', None)
+        return caller, func.__self__ if caller is not None else None
+
+    if func.__class__ is MethodDescriptor:
+        return func.caller, None
+
+    if func.__class__ is property:
+        if func.fget.__class__ is MethodType \
+                and func.fget.__self__.__class__ is MethodCaller:
+            return func.fget.__self__, None
+        return getattr(func.fget, '__method_caller__', None), None
+
+    return getattr(func, '__method_caller__', None), None
+
+
+def set_cache_hooks(
+        func:       Any,
+        /, *,
+        on_hit:     Optional[Callable[[Any], None]]        = None,
+        on_miss:    Optional[Callable[[Any], None]]        = None,
+        on_compute: Optional[Callable[[Any, float], None]] = None
+) -> None:
+    if isinstance(func, FuncCache) or isinstance(func.__class__, FuncCache):
+        # The callbacks of a method are shared by all its instances.
+        cls: FuncCache = func if isinstance(func, FuncCache) else func.__class__
+        stats_list: List[Stats] = [
+            caller.__cache_stats__
+            for caller in cls.__method_callers__.values()
+        ]
+    else:
+        caller, _ = find_method_caller(func)
+        if caller is not None:
+            stats_list = [caller.__cache_stats__]
+        elif hasattr(func, '__cache_stats__'):
+            stats_list = [func.__cache_stats__]
+        else:
+            raise TypeError(
+                f'"{func.__module__}.{func.__qualname__}" is not cached.'
+            )
+
+    for stats in stats_list:
+        stats.on_hit = on_hit
+        stats.on_miss = on_miss
+        stats.on_compute = on_compute
+
+
+def warm(
+        func:     Any,
+        calls:    Iterable,
+        /, *,
+        workers:  int                                  = 32,
+        executor: Optional[Executor]                   = None,
+        progress: Optional[Callable[[int, int], None]] = None
+) -> Union[WarmInfo, Awaitable[WarmInfo]]:
+    if not (workers.__class__ is int and workers > 0):
+        raise ValueError(
+            f'parameter "workers" is expected to be a positive int, not '
+            f'{workers!r}.'
+        )
+    if isinstance(executor, ProcessPoolExecutor):
+        raise TypeError(
+            'parameter "executor" can not be a process pool, the values '
+            'computed there would not reach this cache pool.'
+        )
+
+    calls: List[Tuple[tuple, dict]] = list(map(warm_arguments, calls))
+
+    if asyncio.iscoroutinefunction(getattr(func, '__wrapped__', func)):
+        return awarm(func, calls, workers, progress)
+
+    start: float = time.monotonic()
+    results: List[Optional[bool]] = []
+    pool: Executor = executor or ThreadPoolExecutor(
+        workers, f'{__package__}.warm'
+    )
+
+    try:
+        futures: List[Future] = [
+            pool.submit(warm_call, func, a, kw) for a, kw in calls
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results), len(calls))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    return warm_info(results, time.monotonic() - start)
+
+
+async def awarm(
+        func:     Any,
+        calls:    List[Tuple[tuple, dict]],
+        workers:  int,
+        progress: Optional[Callable[[int, int], None]],
+        /
+) -> WarmInfo:
+    start: float = time.monotonic()
+    results: List[Optional[bool]] = []
+    semaphore = asyncio.Semaphore(workers)
+
+    async def warm_one(a: tuple, kw: dict, /) -> None:
+        async with semaphore:
+            results.append(await awarm_call(func, a, kw))
+        if progress is not None:
+            progress(len(results), len(calls))
+
+    await asyncio.gather(*(warm_one(a, kw) for a, kw in calls))
+
+    return warm_info(results, time.monotonic() - start)
+
+
+def warm_arguments(call: Any, /) -> Tuple[tuple, dict]:
+    if call.__class__ is tuple:
+        return call, {}
+    if call.__class__ is dict:
+        return (), call
+    return (call,), {}
+
+
+def warm_call(func: Any, a: tuple, kw: dict, /) -> Optional[bool]:
+    # True if computed, False if already cached, None if failed. The call goes
+    # through the cached function, a key being computed by a live call is
+    # waited for, not computed again.
+    if is_cached(func, a, kw):
+        return False
+    try:
+        func(*a, **kw)
+    except Exception:
+        return None
+    return True
+
+
+async def awarm_call(func: Any, a: tuple, kw: dict, /) -> Optional[bool]:
+    if is_cached(func, a, kw):
+        return False
+    try:
+        await func(*a, **kw)
+    except Exception:
+        return None
+    return True
+
+
+def is_cached(func: Any, a: tuple, kw: dict, /) -> bool:
+    pool, key = find_cache_key(func, a, kw)
+    entry: Optional[Entry] = None if pool is None else pool.get(key)
+    if entry is None or entry.value is missing:
+        return False
+    # Asking a `CountEntry` whether it is stale would count a call.
+    return entry.__class__ is CountEntry or not entry.stale()
+
+
+def warm_info(results: List[Optional[bool]], seconds: float, /) -> WarmInfo:
+    return WarmInfo(
+        len(results), results.count(True), results.count(False),
+        results.count(None), seconds
+    )
 
 
 def time2second(unit_time: str, /, *, __pattern__ = re.compile(r'''
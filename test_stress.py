@@ -0,0 +1,400 @@
+"""
+Stress tests of funccache under threads, asyncio and processes, each asserting
+an exact outcome rather than printing one. Run with `python test_stress.py`,
+or with pytest.
+"""
+import os
+import sys
+import math
+import time
+import asyncio
+import tempfile
+import threading
+import subprocess
+
+import funccache
+
+
+def run_threads(target, threads: int = 8) -> None:
+    # All threads start calling at once, switching as often as possible.
+    interval: float = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    barrier = threading.Barrier(threads)
+
+    def run() -> None:
+        barrier.wait()
+        target()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def run_process(code: str, *args: str) -> subprocess.Popen:
+    # Runs `code` in a new interpreter, importing funccache from this tree.
+    env = dict(
+        os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__))
+    )
+    return subprocess.Popen(
+        [sys.executable, '-c', code, *args], env=env,
+        stdout=subprocess.PIPE, text=True
+    )
+
+
+def output(process: subprocess.Popen) -> str:
+    stdout: str = process.communicate()[0]
+    assert process.returncode == 0, process.returncode
+    return stdout.strip()
+
+
+def test_count_is_exact_under_threads():
+    for count in (1, 2, 3, 7, 50):
+        computed = []
+
+        @funccache.count(count)
+        def f():
+            computed.append(None)
+
+        run_threads(lambda: [f() for _ in range(5000)])
+        assert len(computed) == math.ceil(8 * 5000 / count), \
+            (count, len(computed))
+
+
+def test_count_method_is_exact_under_threads():
+    computed = []
+
+    class A(metaclass=funccache):
+
+        @funccache.policy(count=4)
+        def method(self):
+            computed.append(None)
+
+    a = A()
+    run_threads(lambda: [a.method() for _ in range(4000)])
+    assert len(computed) == 8 * 4000 // 4, len(computed)
+
+
+def test_count_default_never_expires():
+    computed = []
+
+    @funccache.count()
+    def f():
+        computed.append(None)
+
+    run_threads(lambda: [f() for _ in range(1000)])
+    assert len(computed) == 1, len(computed)
+
+
+def test_single_flight_under_threads():
+    computed = []
+
+    @funccache.ttl(3600)
+    def f(x):
+        computed.append(x)
+        time.sleep(0.05)
+        return [x]
+
+    results = []
+    run_threads(lambda: results.append(f(1)), threads=16)
+    assert computed == [1], computed
+    assert all(result is results[0] for result in results)
+
+
+def test_single_flight_under_asyncio():
+    computed = []
+
+    @funccache.ttl(3600)
+    async def f(x):
+        computed.append(x)
+        await asyncio.sleep(0.05)
+        return [x]
+
+    async def main() -> list:
+        return await asyncio.gather(*(f(x % 3) for x in range(300)))
+
+    results = asyncio.run(main())
+    assert sorted(computed) == [0, 1, 2], computed
+    assert all(result is results[x % 3] for x, result in enumerate(results))
+
+
+def test_failed_flight_is_computed_again():
+    computed = []
+
+    @funccache
+    def f():
+        computed.append(None)
+        time.sleep(0.01)
+        if len(computed) == 1:
+            raise ValueError
+        return 'ok'
+
+    errors, results = [], []
+
+    def call() -> None:
+        try:
+            results.append(f())
+        except ValueError:
+            errors.append(None)
+
+    run_threads(call)
+    assert len(errors) == 1 and results == ['ok'] * 7, (errors, results)
+    assert len(computed) == 2, len(computed)
+
+
+def test_maxsize_bounds_the_pool_under_threads():
+    for eviction in ('LRU', 'LFU', 'FIFO'):
+
+        @funccache(maxsize=100, eviction=eviction)
+        def f(x):
+            return x
+
+        run_threads(lambda: [f(x % 1000) for x in range(5000)])
+        assert len(f.__cache_pool__) <= 100, (eviction, len(f.__cache_pool__))
+        assert funccache.cache_info(f).evictions > 0
+
+
+def test_max_bytes_bounds_the_pool():
+
+    @funccache(max_bytes=10_000)
+    def f(x):
+        return b'x' * x
+
+    run_threads(lambda: [f(x) for x in range(1, 500)])
+    assert 0 < funccache.cache_info(f).nbytes <= 10_000
+
+    f(50_000)
+    assert 50_000 not in [key[0][0] for key in f.__cache_pool__]
+    assert len(f.__cache_pool__) > 0
+
+
+def test_expired_keys_are_dropped():
+
+    @funccache.ttl(0.01)
+    def f(x):
+        return x
+
+    end: float = time.monotonic() + 0.5
+    while time.monotonic() < end:
+        for x in range(10):
+            f(x)
+    pool = f.__cache_pool__
+    assert len(pool) <= 10 and len(pool.expiry) <= 2 * len(pool) + 1, \
+        (len(pool), len(pool.expiry))
+
+    time.sleep(0.02)
+    f(-1)
+    assert len(pool) == 1, len(pool)
+
+
+def test_expiry_of_a_method_recomputed_in_place_is_bounded():
+
+    class A(metaclass=funccache):
+        __ttl__ = 0
+
+        def method(self):
+            return 1
+
+    a = A()
+    run_threads(lambda: [a.method() for _ in range(10_000)])
+    assert len(a.__cache_pool__.expiry) <= 3, len(a.__cache_pool__.expiry)
+
+
+def test_invalidate_under_threads():
+    version = [0]
+
+    @funccache
+    def f(x):
+        return x, version[0]
+
+    def call() -> None:
+        for x in range(1000):
+            f(x % 10)
+            if x % 100 == 0:
+                funccache.invalidate(f, x % 10)
+
+    run_threads(call)
+    version[0] = 1
+    for x in range(10):
+        funccache.invalidate(f, x)
+    assert [f(x) for x in range(10)] == [(x, 1) for x in range(10)]
+
+
+def test_invalidate_while_computing_drops_the_value():
+    started, release = threading.Event(), threading.Event()
+    computed = []
+
+    @funccache
+    def f():
+        computed.append(None)
+        started.set()
+        release.wait()
+        return len(computed)
+
+    worker = threading.Thread(target=f)
+    worker.start()
+    started.wait()
+    funccache.invalidate(f)
+    release.set()
+    worker.join()
+    assert f() == 2 and f() == 2, computed
+
+
+
+def test_class_with_getattr():
+
+    class Record(metaclass=funccache):
+
+        def __init__(self):
+            self.fields = {}
+
+        def __getattr__(self, name):
+            return self.fields[name]
+
+        def method(self, x):
+            return [x]
+
+    record = Record()
+    assert funccache.invalidate(record.method, 1) is False
+    assert record.method(1) is record.method(1)
+    assert funccache.invalidate(record.method, 1) is True
+
+
+def test_tags_of_failing_keys_are_dropped():
+
+    @funccache.ttl(
+        3600, tags=lambda x: [x, 'all'], cache_exceptions=KeyError,
+        exception_ttl=60
+    )
+    def f(x):
+        raise KeyError(x)
+
+    for x in range(1000):
+        for _ in range(2):
+            try:
+                f(x)
+            except KeyError:
+                pass
+    pool = f.__cache_pool__
+    assert not pool and not pool.tagged and not pool.tags, \
+        (len(pool), len(pool.tagged), len(pool.tags))
+
+
+disk_code = """
+import sys, funccache
+
+@funccache(disk=sys.argv[1])
+def f(x):
+    return sys.argv[2]
+
+if sys.argv[3:] == ['invalidate']:
+    funccache.invalidate(f, 1)
+print(f(1))
+"""
+
+
+def test_disk_round_trip_and_invalidate_across_restarts():
+    with tempfile.TemporaryDirectory() as d:
+        path: str = os.path.join(d, 'cache.db')
+        assert output(run_process(disk_code, path, 'a')) == 'a'
+        assert output(run_process(disk_code, path, 'b')) == 'a'
+        assert output(run_process(disk_code, path, 'c', 'invalidate')) == 'c'
+        assert output(run_process(disk_code, path, 'd')) == 'c'
+
+
+shared_code = """
+import sys, time, funccache
+
+@funccache(shared=sys.argv[1])
+def f(x):
+    print('computed', flush=True)
+    time.sleep(0.5)
+    return x * 2
+
+print(f(21))
+"""
+
+
+def test_shared_store_single_flight_across_processes():
+    with tempfile.TemporaryDirectory() as d:
+        path: str = os.path.join(d, 'shared.db')
+        processes = [run_process(shared_code, path) for _ in range(4)]
+        lines: list = '\n'.join(map(output, processes)).split()
+    assert lines.count('computed') == 1, lines
+    assert lines.count('42') == 4, lines
+
+
+def test_batch_fans_out_and_raises_key_error():
+    calls = []
+
+    @funccache.batch(3600)
+    async def users(ids):
+        calls.append(sorted(ids))
+        await asyncio.sleep(0)
+        return {i: f'u{i}' for i in ids if i != 99}
+
+    async def main() -> None:
+        results = await asyncio.gather(*(users(i) for i in (1, 2, 1, 3)))
+        assert results == ['u1', 'u2', 'u1', 'u3'], results
+        assert calls == [[1, 2, 3]], calls
+        assert await users(2) == 'u2' and len(calls) == 1, calls
+        try:
+            await users(99)
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('a missing key is expected to raise')
+
+    asyncio.run(main())
+
+
+def test_stream_replay_and_overflow():
+    produced = []
+
+    @funccache(max_items=5)
+    def numbers(n):
+        for x in range(n):
+            produced.append(x)
+            yield x
+
+    assert list(numbers(3)) == list(numbers(3)) == [0, 1, 2]
+    assert produced == [0, 1, 2], produced
+
+    produced.clear()
+    a, b = numbers(1000), numbers(1000)
+    assert list(zip(a, b)) == [(x, x) for x in range(1000)]
+    # Only the stream of 3 items is left in the cache.
+    assert len(produced) == 1000 and len(numbers.__cache_pool__) == 1
+    assert list(numbers(1000)) == list(range(1000))
+    assert len(produced) == 2000 and len(numbers.__cache_pool__) == 1
+
+
+def test_depends_on_recomputes_after_a_file_change():
+    computed = []
+
+    @funccache.ttl(3600, depends_on=lambda path: [path], check_interval=0.05)
+    def read(path):
+        computed.append(path)
+        with open(path) as f:
+            return f.read()
+
+    with tempfile.TemporaryDirectory() as d:
+        path: str = os.path.join(d, 'config.txt')
+        with open(path, 'w') as f:
+            f.write('a')
+        assert read(path) == 'a' and read(path) == 'a'
+        with open(path, 'w') as f:
+            f.write('bb')
+        time.sleep(0.06)
+        assert read(path) == 'bb' and read(path) == 'bb'
+    assert len(computed) == 2, computed
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f'{name} passed.')